@@ -15,6 +15,7 @@ def main():
     
     node = ChordNode(ip, port)
     node.create()
+    node.start_maintenance()
 
 
     # Start the node
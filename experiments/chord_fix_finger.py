@@ -1,3 +1,4 @@
+import logging
 import sys
 import os
 import signal
@@ -7,6 +8,9 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 from chord import Node as ChordNode
 
 def main():
+    # log_finger_table logs at INFO
+    logging.basicConfig(level=logging.INFO)
+
     # Get IP and port from command line arguments
     ip = sys.argv[1]
     port = int(sys.argv[2])
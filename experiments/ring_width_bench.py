@@ -0,0 +1,98 @@
+# Compares lookup and finger maintenance cost at different id widths.
+# Nodes run in-process with RPCs delivered as direct calls, so the timings
+# show the routing and ring arithmetic cost without network noise.
+#
+#   python ring_width_bench.py [nodes] [lookups]
+import sys
+import os
+import random
+import time
+from concurrent.futures import Future
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from chord import Node as ChordNode
+
+WIDTHS = (16, 32, 64, 160)
+
+def build_ring(count, m):
+    """
+    Builds `count` nodes with correct successors and fingers on a 2 ** m ring.
+    """
+    nodes = {}
+    for i in range(count):
+        node = ChordNode('10.0.0.1', 6000 + i, m=m)
+        nodes[(node.address.ip, node.address.port)] = node
+    ring = sorted(nodes.values(), key=lambda n: n.address.key)
+    keys = [n.address.key for n in ring]
+
+    def owner(id):
+        for node, key in zip(ring, keys):
+            if key >= id:
+                return node.address
+        return ring[0].address
+
+    def deliver(dest, method, *args, timeout=None):
+        return nodes[(dest.ip, dest.port)]._process_request(method, list(args))
+
+    def submit(dest, method, *args):
+        future = Future()
+        future.set_result(deliver(dest, method, *args))
+        return future
+
+    for i, node in enumerate(ring):
+        node.predecessor = ring[i - 1].address
+        node.successor_list = [ring[(i + 1) % count].address]
+        node.finger_table = [owner(node._ring.finger_start(node.address.key, f))
+                             for f in range(m)]
+        # Every way a node sends requests, so none reach the network
+        node._net.send_request = deliver
+        node._net.request = deliver
+        node._net.submit_request = submit
+    return ring
+
+
+
+def bench(count, lookups, m):
+    random.seed(m)
+    ring = build_ring(count, m)
+    ids = [random.randrange(2 ** m) for _ in range(lookups)]
+
+    start = time.perf_counter()
+    found = [random.choice(ring).find_successor(id) for id in ids]
+    lookup_time = time.perf_counter() - start
+
+    # A wrong owner means a request went somewhere it shouldn't have
+    keys = sorted(node.address.key for node in ring)
+    for id, owner in zip(ids, found):
+        assert owner.key == next((k for k in keys if k >= id), keys[0])
+
+    # One full pass of fix_fingers over every finger of every node,
+    # normalised per finger so that widths can be compared
+    start = time.perf_counter()
+    for node in ring:
+        for _ in range(m):
+            node.fix_fingers()
+    finger_time = (time.perf_counter() - start) / (count * m)
+
+    start = time.perf_counter()
+    for node in ring:
+        for id in ids:
+            node._is_key_in_range(id)
+    range_time = (time.perf_counter() - start) / (count * lookups)
+
+    return lookup_time / lookups, finger_time, range_time
+
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    print(f"{count} nodes, {lookups} lookups")
+    print(f"{'m':>4} {'lookup (us)':>12} {'fix_finger (us)':>16} {'in_range (ns)':>14}")
+    for m in WIDTHS:
+        lookup, finger, in_range = bench(count, lookups, m)
+        print(f"{m:>4} {lookup * 1e6:>12.1f} {finger * 1e6:>16.1f} {in_range * 1e9:>14.0f}")
+
+if __name__ == '__main__':
+    main()
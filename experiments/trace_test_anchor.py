@@ -4,18 +4,10 @@ import sys
 import os
 import signal
 import time
-import threading 
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 from chord import Node as ChordNode
 
-def stabilize_node(node):
-    while True:
-        node.stabilize()
-        node.fix_fingers()
-        time.sleep(1)  # Call stabilize every 2 seconds
-
-
 def main():
     # Get IP and port from command line arguments
     ip = sys.argv[1]
@@ -24,8 +16,8 @@ def main():
     node = ChordNode(ip, port)
     node.create()
 
-    stabilize_thread = threading.Thread(target=stabilize_node, args=(node,), daemon=True)
-    stabilize_thread.start()
+    # Run stabilize, fix_fingers and check_predecessor in the background
+    node.start_maintenance()
 
     # Setup signal handling for graceful shutdown
     def signal_handler(signum, frame):
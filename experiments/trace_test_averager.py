@@ -4,19 +4,12 @@ import sys
 import os
 import signal
 import time
-import threading
 # from . import Address  # Ensure Address is imported
 # from src.chord.address import Address
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 from chord import Node as ChordNode
 
-def stabilize_node(node):
-    while True:
-        time.sleep(1)
-        node.stabilize()
-        node.fix_fingers()
-
 def trace_all_keys(node, output_file):
     """
     Traces successors for all keys in the hash space and logs hops.
@@ -39,8 +32,8 @@ def main():
     node = ChordNode(ip, port)
     node.join(known, port)
 
-    stabilize_thread = threading.Thread(target=stabilize_node, args=(node,), daemon=True)
-    stabilize_thread.start()
+    # Run stabilize, fix_fingers and check_predecessor in the background
+    node.start_maintenance()
 
     # Setup signal handling for graceful shutdown
     def signal_handler(signum, frame):
@@ -51,7 +44,7 @@ def main():
     # Register signal handlers
     signal.signal(signal.SIGINT, signal_handler)  # Ctrl+C
     signal.signal(signal.SIGTERM, signal_handler)  # Termination signal
-    time.sleep(16) # let the fingertable populate
+    time.sleep(2) # join warm-starts the fingers; let stabilize settle the neighbours
     
 
     output_file = f"/tmp/trace_results_{ip}_{port}.log"
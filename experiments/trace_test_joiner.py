@@ -4,18 +4,10 @@ import sys
 import os
 import signal
 import time
-import threading
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 from chord import Node as ChordNode
 
-def stabilize_node(node):
-    while True:
-        time.sleep(1)
-        node.stabilize()
-        node.fix_fingers()
-
-
 def main():
     # Get IP and port from command line arguments
     ip = sys.argv[1]
@@ -26,8 +18,8 @@ def main():
     node = ChordNode(ip, port)
     node.join(known, port)
     
-    stabilize_thread = threading.Thread(target=stabilize_node, args=(node,), daemon=True)
-    stabilize_thread.start()
+    # Run stabilize, fix_fingers and check_predecessor in the background
+    node.start_maintenance()
 
     # Setup signal handling for graceful shutdown
     def signal_handler(signum, frame):
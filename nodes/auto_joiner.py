@@ -17,6 +17,7 @@ def main():
     # Create and join node
     node = ChordNode(ip, port)
     node.join(known, port)
+    node.start_maintenance()
     
     # Start the node
     print(f"Chord node started: {node.address}")
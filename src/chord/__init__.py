@@ -1,6 +1,9 @@
 from .node import Node
 from .address import Address
 from .net import _Net
+from .aio import AsyncNet, AsyncNode
+from .log import start_async_logging
 
-__all__ = ['Node', 'Address', '_Net']
+__all__ = ['Node', 'Address', '_Net', 'AsyncNet', 'AsyncNode',
+           'start_async_logging']
 
@@ -1,6 +1,15 @@
 # address.py
 
-import hashlib
+import functools
+import socket
+import struct
+import threading
+import weakref
+
+from .ring import MAX_M, get_ring
+
+KEY_BYTES = MAX_M // 8
+_PACKED = struct.Struct(f'!4sH{KEY_BYTES}s') # IPv4 | port | key
 
 class Address:
     """
@@ -14,44 +23,164 @@ class Address:
         ip (str): The IP address of the node.
         port (int): The network port number of the node.
 
+    Addresses are immutable and hashable, so they can be used as dict or
+    set keys and one instance can be shared by everything that refers to
+    the same node (see `intern`). Instances have no `__dict__`. An IPv4
+    address packs into PACKED_SIZE bytes (see `to_bytes`).
+
     Provides methods for equality comparison and string representation.
     """
     _M = 16
     _SPACE = 2 ** _M
 
-    __slots__: ['key', 'ip', 'port']
+    _interned = weakref.WeakValueDictionary() # (ip, port, key) -> Address
+    _intern_lock = threading.Lock()
 
-    def __init__(self, ip, port):
-        self.key = self._hash(f"{ip}:{port}")
-        self.ip = ip
-        self.port = port
+    PACKED_SIZE = _PACKED.size
 
+    __slots__ = ('key', 'ip', 'port', '_hashcode', '__weakref__')
 
+    def __init__(self, ip, port, m=_M, key=None):
+        """
+        Args:
+            ip (str): IP address of the node.
+            port (int): Port number of the node.
+            m (int): Identifier width of the ring the node belongs to.
+            key (int): The node's key, if already known (e.g. received
+                over the wire). Skips hashing.
+        """
+        if key is None:
+            key = self._hash(f"{ip}:{port}", m)
+        object.__setattr__(self, 'key', key)
+        object.__setattr__(self, 'ip', ip)
+        object.__setattr__(self, 'port', port)
+        object.__setattr__(self, '_hashcode', hash((ip, port, key)))
 
-    
-    def _hash(self, key):
+
+
+    @classmethod
+    def intern(cls, ip, port, key=None, m=_M):
+        """
+        Returns the shared Address for a node, creating it on first use.
+
+        Instances stay registered for as long as anything refers to them.
+
+        Args:
+            ip (str): IP address of the node.
+            port (int): Port number of the node.
+            key (int): The node's key, if already known. Skips hashing.
+            m (int): Identifier width, used only when the key is unknown.
+
+        Returns:
+            Address: The interned instance.
+        """
+        if key is None:
+            key = cls._hash(f"{ip}:{port}", m)
+        address = cls._interned.get((ip, port, key))
+        if address is None:
+            with cls._intern_lock:
+                address = cls._interned.get((ip, port, key))
+                if address is None:
+                    address = cls(ip, port, key=key)
+                    cls._interned[(ip, port, key)] = address
+        return address
+
+
+
+    def to_bytes(self):
+        """
+        Packs the address as IPv4 (4 bytes) | port (u16) | key (KEY_BYTES).
+
+        Returns:
+            bytes: The PACKED_SIZE-byte packed form.
+
+        Raises:
+            ValueError: If the ip isn't a dotted-quad IPv4 address.
+        """
+        # inet_aton also accepts shorthand like "127.1"; only dotted quads
+        # are packed so the ip string survives the round trip unchanged
+        try:
+            if self.ip.count('.') != 3:
+                raise OSError
+            packed_ip = socket.inet_aton(self.ip)
+        except OSError:
+            raise ValueError(f"Not an IPv4 address: {self.ip}") from None
+        return _PACKED.pack(packed_ip, self.port,
+                            self.key.to_bytes(KEY_BYTES, 'big'))
+
+
+
+    @classmethod
+    def from_bytes(cls, data, offset=0):
+        """
+        Unpacks an address packed by `to_bytes`.
+
+        Args:
+            data (bytes-like): Buffer holding the packed address.
+            offset (int): Where in the buffer it starts.
+
+        Returns:
+            Address: The interned address.
+
+        Raises:
+            struct.error: If the buffer is too short.
+        """
+        packed_ip, port, key = _PACKED.unpack_from(data, offset)
+        return cls.intern(socket.inet_ntoa(packed_ip), port,
+                          int.from_bytes(key, 'big'))
+
+
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _hash(key, m=_M):
         """
         Generates a consistent hash for identifiers.
 
+        Results are memoized, since the same peers are hashed repeatedly.
+
         Args:
             key (str): Input string to hash.
+            m (int): Identifier width of the ring.
 
         Returns:
             int: Hashed identifier within the hash space.
         """
-        return int(hashlib.sha1(key.encode()).hexdigest(), 16) % Address._SPACE
+        return get_ring(m).hash(key)
+
+
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Address is immutable, can't set {name}")
+
+
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Address is immutable, can't delete {name}")
 
 
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if not isinstance(other, Address):
             return False
         return (self.ip == other.ip and 
                 self.port == other.port and 
                 self.key == other.key)
+
+
+
+    def __hash__(self):
+        return self._hashcode
     
 
 
+    def __reduce__(self):
+        return (Address, (self.ip, self.port, Address._M, self.key))
+
+
+
     def __repr__(self):
         return f"{self.key}:{self.ip}:{self.port}"
 
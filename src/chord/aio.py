@@ -0,0 +1,696 @@
+# aio.py
+
+import asyncio
+import itertools
+import logging
+import time
+
+from . import protocol
+from .address import Address
+from .maintenance import _Maintenance
+from .metrics import _Metrics
+from .net import _peer
+from .node import Node
+
+logger = logging.getLogger(__name__)
+
+class _AsyncPeer:
+    """
+    One multiplexed client connection to a peer.
+
+    Requests are tagged with ids and any number can be in flight at once.
+    A reader task matches responses to the waiting futures by id.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {} # request id -> Future
+        self.reader_task = asyncio.create_task(self._read_responses())
+
+
+
+    def is_closing(self):
+        return self.writer.is_closing() or self.reader_task.done()
+
+
+
+    def close(self):
+        self.writer.close()
+        self.reader_task.cancel()
+
+
+
+    async def _read_responses(self):
+        error = ConnectionResetError("connection closed by peer")
+        try:
+            while True:
+                header = await self.reader.readexactly(protocol.HEADER.size)
+                opcode, request_id, length = protocol.HEADER.unpack(header)
+                if length > protocol.MAX_PAYLOAD:
+                    raise ValueError(f"Frame too large: {length} bytes")
+                payload = await self.reader.readexactly(length)
+                future = self.pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                try:
+                    future.set_result(protocol.decode_value(payload))
+                except ValueError as e:
+                    future.set_exception(e)
+        except asyncio.IncompleteReadError:
+            pass
+        except (OSError, ValueError) as e:
+            error = e
+        finally:
+            self.writer.close()
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self.pending.clear()
+
+
+
+class AsyncNet:
+    """
+    asyncio counterpart of `_Net`, speaking the same wire protocol.
+
+    Inbound requests are served by `asyncio.start_server`; each request on
+    a connection is handled in its own task, so a slow lookup doesn't hold
+    up the others. Outbound requests share one connection per peer.
+    """
+
+    def __init__(self, ip, port, request_handler, timeout=5.0, backlog=128,
+                 metrics=None):
+        """
+        Args:
+            ip (str): IP address to listen on.
+            port (int): Port to listen on.
+            request_handler (coroutine function): Called as
+                `await request_handler(method, args)` for each request.
+            timeout (float): Seconds to wait for a connection or response.
+            backlog (int): Accept backlog of the listening socket.
+            metrics (_Metrics): Registry to record traffic in, shared
+                with the owning node. Uses the same metrics as `_Net`.
+        """
+        self._ip = ip
+        self._port = port
+        self._request_handler = request_handler
+        self._timeout = timeout
+        self._backlog = backlog
+        self._server = None
+        self._peers = {} # (ip, port) -> _AsyncPeer
+        self._connecting = {} # (ip, port) -> Lock
+        self._request_ids = itertools.count(1)
+        self._handlers = set()
+        self._clients = set() # writers of inbound connections
+
+        self.metrics = metrics or _Metrics()
+        self._requests_sent = self.metrics.counter(
+            'chord_rpc_requests_total', 'Requests sent, by method.', ('method',))
+        self._request_failures = self.metrics.counter(
+            'chord_rpc_failures_total',
+            'Requests sent that got no usable answer, by method and reason '
+            '(timeout, refused, busy, cancelled or error).', ('method', 'reason'))
+        self._request_latency = self.metrics.histogram(
+            'chord_rpc_latency_seconds',
+            'Time from sending a request to its answer, by method and peer.',
+            ('method', 'peer'))
+        self._requests_handled = self.metrics.counter(
+            'chord_requests_handled_total', 'Requests received, by method.',
+            ('method',))
+        self._handling_time = self.metrics.histogram(
+            'chord_request_handling_seconds',
+            'Time spent handling a received request, by method.', ('method',))
+
+
+
+    async def start(self):
+        """Starts listening for incoming connections."""
+        self._server = await asyncio.start_server(
+            self._handle_connection, self._ip, self._port,
+            backlog=self._backlog
+        )
+
+
+
+    async def stop(self):
+        """Stops the listener and closes every connection."""
+        if self._server:
+            self._server.close()
+            for writer in list(self._clients):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in list(self._handlers):
+            task.cancel()
+        for peer in self._peers.values():
+            peer.close()
+        self._peers.clear()
+
+
+
+    def stats(self):
+        """
+        Reports the load on this node's request handling, in the same
+        shape as `_Net.stats()`.
+
+        Requests run as tasks rather than on a worker pool, so nothing
+        ever queues: active is the number of requests being handled.
+
+        Returns:
+            dict: active, queue_depth, queue_capacity and the number of
+                open inbound connections.
+        """
+        return {
+            'active': len(self._handlers),
+            'queue_depth': 0,
+            'queue_capacity': 0,
+            'connections': len(self._clients),
+        }
+
+
+
+    def rtt(self, dest_node):
+        """
+        Returns the smoothed round-trip time to a destination in seconds.
+
+        Round trips aren't measured here yet, so this is always None.
+        """
+        return None
+
+
+
+    async def send_request(self, dest_node, method, *args):
+        """
+        Sends a network request to a specific node.
+
+        Args:
+            dest_node (Address): The network address to send the request to
+            method (str): The method/request type to invoke
+            *args: Variable arguments to pass with the request
+
+        Returns:
+            The response from the target node, or None if communication
+                fails. protocol.BUSY if the node was too loaded to handle it.
+        """
+        self._requests_sent.inc(method)
+        request_id = next(self._request_ids) & 0xFFFFFFFF
+        try:
+            request = protocol.encode_request(method, request_id, args)
+        except ValueError as e:
+            logger.warning("Network request error: %s", e)
+            self._request_failures.inc(method, 'error')
+            return None
+
+        # A reused connection may turn out to be dead; retry once on a new one
+        for attempt in range(2):
+            peer, reused = None, None
+            try:
+                peer, reused = await self._get_peer(dest_node)
+                future = asyncio.get_running_loop().create_future()
+                peer.pending[request_id] = future
+                sent = time.monotonic()
+                peer.writer.write(request)
+                await peer.writer.drain()
+                response = await asyncio.wait_for(future, self._timeout)
+
+            except asyncio.TimeoutError:
+                logger.info("Request to %s timed out", dest_node)
+                self._request_failures.inc(method, 'timeout')
+                return None
+            except ConnectionRefusedError:
+                logger.info("Connection to %s refused", dest_node)
+                self._request_failures.inc(method, 'refused')
+                return None
+            except (OSError, ValueError) as e:
+                if isinstance(e, OSError) and reused and attempt == 0:
+                    continue
+                logger.warning("Network request error: %s", e)
+                self._request_failures.inc(method, 'error')
+                return None
+            finally:
+                if peer is not None:
+                    peer.pending.pop(request_id, None)
+
+            self._request_latency.observe(time.monotonic() - sent, method,
+                                          _peer(dest_node))
+            if response is protocol.BUSY:
+                self._request_failures.inc(method, 'busy')
+            return response
+
+
+
+    async def _get_peer(self, dest_node):
+        """
+        Returns the open connection to a peer, connecting if needed.
+
+        Returns:
+            tuple: (_AsyncPeer, bool) where the flag is True if the
+                connection already existed.
+        """
+        key = (dest_node.ip, dest_node.port)
+        peer = self._peers.get(key)
+        if peer and not peer.is_closing():
+            return peer, True
+
+        lock = self._connecting.setdefault(key, asyncio.Lock())
+        async with lock:
+            peer = self._peers.get(key)
+            if peer and not peer.is_closing():
+                return peer, True
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(dest_node.ip, dest_node.port),
+                self._timeout
+            )
+            peer = _AsyncPeer(reader, writer)
+            self._peers[key] = peer
+            return peer, False
+
+
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Reads requests from a client until it disconnects.
+
+        Each request is handled in its own task, and responses are written
+        as they complete, so they may go out in a different order.
+        """
+        tasks = set()
+        self._clients.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(protocol.HEADER.size)
+                opcode, request_id, length = protocol.HEADER.unpack(header)
+                if length > protocol.MAX_PAYLOAD:
+                    raise ValueError(f"Frame too large: {length} bytes")
+                payload = await reader.readexactly(length)
+
+                task = asyncio.create_task(
+                    self._handle_request(writer, opcode, request_id, payload)
+                )
+                tasks.add(task)
+                self._handlers.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(self._handlers.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.warning("Error handling connection: %s", e)
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self._clients.discard(writer)
+            writer.close()
+
+
+
+    async def _handle_request(self, writer, opcode, request_id, payload):
+        method = protocol.METHODS.get(opcode, 'UNKNOWN')
+        started = time.monotonic()
+        try:
+            args = protocol.decode_values(payload)
+            response = await self._request_handler(method, args)
+            frame = protocol.encode_response(opcode, request_id, response)
+        except Exception as e:
+            logger.error("Error handling %s request: %s", method, e)
+            frame = protocol.encode_response(opcode, request_id, "ERROR")
+
+        self._requests_handled.inc(method)
+        self._handling_time.observe(time.monotonic() - started, method)
+
+        if writer.is_closing():
+            return
+        writer.write(frame)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+
+class _AsyncMaintenance(_Maintenance):
+    """
+    `_Maintenance` for coroutine tasks, run as a task on the event loop.
+
+    Periods, backoff, jitter and `reset` work as in `_Maintenance`; tasks
+    are awaited one at a time, and waiting between them doesn't block the
+    loop.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loop = None
+        self._loop_task = None
+        self._changed = None # asyncio.Event, set when the schedule moves up
+
+
+
+    def start(self):
+        """
+        Starts running the tasks, each one right away. Must be called
+        from the event loop the tasks run on.
+        """
+        loop = asyncio.get_running_loop()
+        if not self._begin():
+            return
+        self._loop = loop
+        self._changed = asyncio.Event()
+        self._loop_task = loop.create_task(self._run())
+
+
+
+    def stop(self, timeout=None):
+        """
+        Stops the scheduler. A task that is running is cancelled.
+
+        Args:
+            timeout (float): Unused; the loop task is cancelled, not joined.
+        """
+        with self._wakeup:
+            self._stopped = True
+        if self._loop_task:
+            self._loop_task.cancel()
+            self._loop_task = None
+
+
+
+    def reset(self):
+        """
+        Returns every task to its base period, e.g. after a known change.
+        Safe to call from any thread.
+        """
+        with self._wakeup:
+            self._speed_up(time.monotonic())
+            stopped = self._stopped
+        if not stopped:
+            self._loop.call_soon_threadsafe(self._changed.set)
+
+
+
+    async def _run(self):
+        while not self._stopped:
+            self._changed.clear()
+            with self._wakeup:
+                task = self._next_task()
+                delay = task.due - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            started = time.monotonic()
+            try:
+                await task.fn()
+            except Exception as e:
+                logger.warning("Maintenance task %s failed: %s", task.name, e)
+            self._finish(task, started)
+
+
+
+class AsyncNode(Node):
+    """
+    A Chord node driven by asyncio instead of threads.
+
+    Routing state and the pure routing logic are shared with `Node`; the
+    methods that talk to other nodes are coroutines here. Many lookups can
+    be in flight at once in a single thread, and intermediate hops don't
+    tie up a thread while waiting for the next hop.
+
+    `start_maintenance` schedules stabilize, fix_fingers and
+    check_predecessor as a task on the running event loop, so it must be
+    called from that loop.
+
+    AsyncNodes and Nodes speak the same protocol and can share a ring.
+    """
+
+    def __init__(self, ip, port, m=Address._M):
+        """
+        Initializes a new asyncio Chord node.
+
+        Args:
+            ip (str): IP address for the node.
+            port (int): Port number to listen on.
+            m (int): Identifier width of the ring in bits.
+        """
+        super().__init__(ip, port, m=m)
+
+
+
+    def _create_net(self, ip, port, udp):
+        """Builds the asyncio transport in place of `_Net`."""
+        return AsyncNet(ip, port, self._process_request, metrics=self._metrics)
+
+
+
+    def _create_maintenance(self, tasks, **kwargs):
+        """Builds the scheduler that runs maintenance on the event loop."""
+        return _AsyncMaintenance(tasks, self._routing_state,
+                                 durations=self._maintenance_time, **kwargs)
+
+
+
+    async def create(self):
+        """
+        Creates a new Chord ring with this node as the initial member.
+        """
+        self._set_successors([self.address], predecessor=None)
+        await self.start()
+        await self.fix_fingers()
+
+
+
+    async def join(self, known_ip, known_port):
+        """
+        Joins an existing Chord ring through a known node's IP and port.
+
+        Args:
+            known_ip (str): IP address of an existing node in the Chord ring.
+            known_port (int): Port number of the existing node.
+
+        Raises:
+            ValueError: If the known node couldn't find this node's successor.
+        """
+        self.predecessor = None
+        known_node_address = Address(known_ip, known_port, self._ring.m)
+
+        response = await self._net.send_request(
+            known_node_address,
+            'FIND_SUCCESSOR',
+            self.address.key
+        )
+        if not isinstance(response, Address):
+            raise ValueError("Failed to find successor. Join failed")
+        self._set_successors([response])
+
+        await self.start()
+        await self.fix_fingers()
+
+
+
+    async def fix_fingers(self):
+        """
+        Incrementally updates one entry in the node's finger table.
+        """
+        if not self.successor():
+            return
+
+        start = self._ring.finger_start(self.address.key, self._next)
+
+        try:
+            responsible_node = await self.find_successor(start)
+            if responsible_node:
+                self._set_finger(self._next, responsible_node)
+        except Exception as e:
+            logger.warning("fix_fingers failed for finger %d: %s", self._next, e)
+
+        self._next = (self._next + 1) % self._ring.m
+
+
+
+    async def find_successor(self, id):
+        """
+        Finds the successor node for a given identifier.
+
+        Args:
+            id (int): Identifier to find the successor for.
+
+        Returns:
+            Address: The address of the node responsible for the given
+                identifier, or None if the lookup failed.
+        """
+        if self._is_key_in_range(id):
+            return self.successor()
+
+        closest_node = self.closest_preceding_finger(id)
+        if closest_node == self.address:
+            return self.successor()
+
+        response = await self._net.send_request(closest_node, 'FIND_SUCCESSOR', id)
+        if not isinstance(response, Address):
+            # Our own successor would only be a guess; callers like
+            # fix_fingers must not record it as the owner
+            logger.warning("Find successor failed: %s", response)
+            return None
+        return response
+
+
+
+    async def find_successors(self, ids):
+        """
+        Finds the successor nodes for many identifiers at once.
+
+        The lookups run concurrently, one per distinct id.
+
+        Returns:
+            dict: id -> Address of the node responsible for it.
+        """
+        ids = list(dict.fromkeys(ids))
+        owners = await asyncio.gather(*(self.find_successor(id) for id in ids))
+        return dict(zip(ids, owners))
+
+
+
+    async def trace_successor(self, id, curr_hops):
+        """
+        Finds the successor node for a given identifier, counting hops.
+
+        Returns:
+            tuple: (Address, int) the responsible node and the hop count.
+        """
+        if self._is_key_in_range(id):
+            return self.successor(), curr_hops
+
+        closest_node = self.closest_preceding_finger(id)
+        if closest_node == self.address:
+            return self.successor(), curr_hops
+
+        response = await self._net.send_request(
+            closest_node, 'TRACE_SUCCESSOR', id, curr_hops
+        )
+        if not isinstance(response, list) or len(response) != 2:
+            logger.warning("trace successor failed: %s", response)
+            return self.successor(), curr_hops
+        address, hops = response
+        return address, hops + 1
+
+
+
+    async def check_predecessor(self):
+        """
+        Checks if the predecessor node has failed.
+
+        Sets predecessor to None if unresponsive.
+        """
+        predecessor = self.predecessor
+        if not predecessor:
+            return
+
+        response = await self._net.send_request(predecessor, 'PING')
+        # A BUSY node is overloaded, not down
+        if response != 'ALIVE' and response is not protocol.BUSY:
+            self._forget_node(predecessor)
+
+
+
+    async def stabilize(self):
+        """
+        Verifies the node's successor and notifies it about this node.
+
+        As in `Node.stabilize`, the successor list is refreshed from the
+        successor's, and a successor that doesn't answer is forgotten so
+        the next live entry takes over.
+        """
+        if not self.successor():
+            return
+
+        forgets = self._forgets
+        failed = set()
+        while True:
+            successor = self.successor()
+            successors = await self._net.send_request(successor, 'GET_SUCCESSOR_LIST')
+            if isinstance(successors, list):
+                break
+            if successors is protocol.BUSY:
+                logger.info("Successor %s is busy, stabilizing later", successor)
+                return
+            if successors is not None:
+                logger.warning("Invalid GET_SUCCESSOR_LIST response: %s", successors)
+                return
+            if successor == self.address or successor.key in failed:
+                # Nothing left to fail over to
+                logger.warning("No reachable successor, stabilizing later")
+                return
+            logger.warning("Successor %s is unreachable, failing over", successor)
+            failed.add(successor.key)
+            self._forget_node(successor)
+
+        x = await self._net.send_request(successor, 'GET_PREDECESSOR')
+        if x is not None and not isinstance(x, Address):
+            logger.warning("Invalid GET_PREDECESSOR response: %s", x)
+            return
+        if x:
+            self._observe_node(x)
+        self._adopt_successors(successor, successors, x, failed, forgets)
+
+        await self.notify(self.successor())
+
+
+
+    async def notify(self, potential_successor):
+        """
+        Notifies a node about a potential predecessor.
+
+        Args:
+            potential_successor (Address): Node that might be the successor.
+
+        Returns:
+            bool: True if the notification is received (regardless of whether the
+                  update occurred), False otherwise
+        """
+        if potential_successor is None:
+            return False
+
+        response = await self._net.send_request(
+            potential_successor,
+            'NOTIFY',
+            self.address
+        )
+        return response == "OK" or response == "IGNORED"
+
+
+
+    async def start(self):
+        """Starts the node's network listener."""
+        await self._net.start()
+
+
+
+    async def stop(self):
+        """
+        Stops maintenance, the metrics server and the node's network
+        listener, and closes its connections.
+        """
+        self.stop_maintenance()
+        self.stop_metrics_server()
+        await self._net.stop()
+
+
+
+    async def _process_request(self, method, args):
+        """
+        Routes incoming requests to appropriate methods.
+
+        Requests that need other nodes are awaited; the rest are answered
+        by `Node._process_request`.
+        """
+        if method == 'FIND_SUCCESSOR':
+            return await self.find_successor(args[0])
+        elif method == 'FIND_SUCCESSORS':
+            results = await self.find_successors(args[0])
+            return [results[id] for id in args[0]]
+        elif method == 'TRACE_SUCCESSOR':
+            successor, hops = await self.trace_successor(args[0], args[1])
+            return [successor, hops]
+        return super()._process_request(method, args)
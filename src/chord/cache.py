@@ -0,0 +1,200 @@
+# cache.py
+
+import bisect
+import threading
+import time
+from collections import OrderedDict
+
+class _CacheEntry:
+    """
+    A cached owner and the identifiers it's known to be responsible for.
+
+    Attributes:
+        start (int): First identifier of the known range.
+        owner (Address): The node responsible for [start, owner.key].
+        expires (float): Monotonic time after which the entry is stale.
+    """
+
+    __slots__ = ('start', 'owner', 'expires')
+
+    def __init__(self, start, owner, expires):
+        self.start = start
+        self.owner = owner
+        self.expires = expires
+
+
+
+class _LookupCache:
+    """
+    Caches lookup results by identifier interval.
+
+    Every lookup result says that its owner is responsible for the looked-up
+    id, and so for every id from there up to the owner's own key. Entries
+    are keyed by owner and cover the widest such range seen so far, so one
+    entry answers all later lookups that fall in it.
+
+    Entries expire after `ttl` seconds, the least recently used entry is
+    evicted when there are more than `max_entries`, and ranges are cut back
+    when the ring changes (see `invalidate_key` and `invalidate_owner`).
+
+    Attributes:
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that weren't.
+        evictions (int): Entries dropped to stay within `max_entries`.
+        invalidations (int): Entries removed or shrunk by topology changes.
+    """
+
+    def __init__(self, max_entries, ttl, ring):
+        """
+        Args:
+            max_entries (int): Maximum number of cached owners.
+            ttl (float): Seconds an entry stays valid.
+            ring (_Ring): Identifier arithmetic of the node's ring.
+        """
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._ring = ring
+        self._entries = OrderedDict() # owner key -> _CacheEntry, LRU first
+        self._keys = [] # sorted owner keys
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+
+
+    def get(self, id):
+        """
+        Looks up the cached owner of an identifier.
+
+        Args:
+            id (int): Identifier to find the owner of.
+
+        Returns:
+            Address: The cached owner, or None on a miss.
+        """
+        with self._lock:
+            entry = self._covering(id)
+            if entry is not None and entry.expires < time.monotonic():
+                self._remove(entry.owner.key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry.owner.key)
+            self.hits += 1
+            return entry.owner
+
+
+
+    def put(self, id, owner):
+        """
+        Records that `owner` is responsible for `id`.
+
+        Args:
+            id (int): The identifier that was looked up.
+            owner (Address): The node found to be responsible for it.
+        """
+        with self._lock:
+            expires = time.monotonic() + self._ttl
+            entry = self._entries.get(owner.key)
+            if entry is not None and entry.owner == owner:
+                # Widen the known range if this id lies further back
+                if self._ring.distance(id, owner.key) > self._ring.distance(entry.start, owner.key):
+                    entry.start = id
+                entry.expires = expires
+                self._entries.move_to_end(owner.key)
+                return
+
+            if entry is not None:
+                self._remove(owner.key)
+            self._entries[owner.key] = _CacheEntry(id, owner, expires)
+            bisect.insort(self._keys, owner.key)
+            while len(self._entries) > self._max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+
+
+    def invalidate_key(self, key):
+        """
+        Accounts for a node with the given key being in the ring.
+
+        Any cached range that contains the key (other than at its own
+        owner) now partly belongs to that node, so it's cut back to start
+        just after the key.
+
+        Args:
+            key (int): Key of a node that joined or was observed.
+        """
+        with self._lock:
+            entry = self._covering(key)
+            if entry is None or entry.owner.key == key:
+                return
+            entry.start = (key + 1) & self._ring.mask
+            self.invalidations += 1
+
+
+
+    def invalidate_owner(self, owner):
+        """
+        Drops the entry for a node that failed or left.
+
+        Args:
+            owner (Address): The node that is gone.
+        """
+        with self._lock:
+            entry = self._entries.get(owner.key)
+            if entry is not None and entry.owner == owner:
+                self._remove(owner.key)
+                self.invalidations += 1
+
+
+
+    def clear(self):
+        """Drops every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._keys = []
+
+
+
+    def stats(self):
+        """
+        Reports cache effectiveness.
+
+        Returns:
+            dict: size, capacity, hits, misses, evictions and invalidations.
+        """
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'capacity': self._max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+
+    def _covering(self, id):
+        """Returns the entry whose range contains `id`, if any."""
+        if not self._keys:
+            return None
+        # Ranges end at their owner's key, so only the first owner at or
+        # after `id` (going around the ring) can cover it.
+        i = bisect.bisect_left(self._keys, id)
+        entry = self._entries[self._keys[i % len(self._keys)]]
+        if self._ring.distance(id, entry.owner.key) <= self._ring.distance(entry.start, entry.owner.key):
+            return entry
+        return None
+
+
+
+    def _remove(self, owner_key):
+        del self._entries[owner_key]
+        i = bisect.bisect_left(self._keys, owner_key)
+        del self._keys[i]
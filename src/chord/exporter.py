@@ -0,0 +1,137 @@
+# exporter.py
+
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def render(snapshot, gauges=()):
+    """
+    Formats metrics in the Prometheus text exposition format.
+
+    Args:
+        snapshot (dict): A `_Metrics.snapshot()`.
+        gauges (iterable): Extra (name, help, labels, values) gauges read
+            at scrape time, where labels is a tuple of label names and
+            values maps label values to a number.
+
+    Returns:
+        str: The exposition text.
+    """
+    lines = []
+    for name, metric in snapshot.items():
+        _header(lines, name, metric['help'], metric['type'])
+        labels = metric['labels']
+        for values, sample in metric['values'].items():
+            if metric['type'] != 'histogram':
+                lines.append(_sample(name, labels, values, sample))
+                continue
+            for bound, count in sample['buckets']:
+                lines.append(_sample(name + '_bucket', labels + ('le',),
+                                     values + (_number(bound),), count))
+            lines.append(_sample(name + '_sum', labels, values, sample['sum']))
+            lines.append(_sample(name + '_count', labels, values, sample['count']))
+    for name, help, labels, values in gauges:
+        _header(lines, name, help, 'gauge')
+        for label_values, value in values.items():
+            lines.append(_sample(name, labels, label_values, value))
+    lines.append('')
+    return '\n'.join(lines)
+
+
+
+def _header(lines, name, help, kind):
+    lines.append(f'# HELP {name} {help}')
+    lines.append(f'# TYPE {name} {kind}')
+
+
+
+def _sample(name, labels, values, value):
+    if not labels:
+        return f'{name} {_number(value)}'
+    pairs = ','.join(f'{label}="{_escape(str(v))}"' for label, v in zip(labels, values))
+    return f'{name}{{{pairs}}} {_number(value)}'
+
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value)
+
+
+
+class _MetricsServer:
+    """
+    Serves a node's metrics over HTTP for Prometheus to scrape.
+
+    The server runs on its own daemon thread, and each scrape gets its
+    own thread too, so a slow scraper never holds up request handling.
+    GET /metrics returns the current text; anything else is a 404.
+    """
+
+    def __init__(self, host, port, collect):
+        """
+        Args:
+            host (str): Interface to listen on.
+            port (int): Port to listen on, or 0 for any free port.
+            collect (callable): Returns the exposition text.
+        """
+        collect_metrics = collect
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                try:
+                    body = collect_metrics().encode()
+                except Exception as e:
+                    logger.error("Collecting metrics failed: %s", e)
+                    self.send_error(500)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("Metrics scrape: " + format, *args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+
+
+    @property
+    def port(self):
+        """The port the server is listening on."""
+        return self._server.server_address[1]
+
+
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name='chord-metrics', daemon=True
+        )
+        self._thread.start()
+
+
+
+    def stop(self):
+        """Stops serving and closes the listening socket."""
+        if self._thread:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
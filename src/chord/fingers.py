@@ -0,0 +1,119 @@
+# fingers.py
+
+import bisect
+
+from .ring import between
+
+class _FingerTable(tuple):
+    """
+    An immutable finger table with a sorted index of its distinct fingers.
+
+    It is the tuple of finger slots (index i holds finger i or None).
+    Alongside, it keeps the keys of the distinct fingers in a sorted
+    array, so `preceding` finds the fingers closest before an id with a
+    binary search instead of scanning every slot.
+
+    Tables are never changed in place. `replace` returns a new table whose
+    index is derived incrementally from this one, so a reader holding a
+    table always sees a consistent set of slots and index.
+    """
+
+    def __new__(cls, fingers=()):
+        table = super().__new__(cls, fingers)
+        table._refs = {} # Address -> number of slots holding it
+        table._keys = [] # sorted distinct keys
+        table._by_key = {} # key -> Address
+        for finger in table:
+            if finger is not None:
+                table._retain(finger)
+        return table
+
+
+
+    def replace(self, index, address):
+        """
+        Returns a copy of the table with one slot changed.
+
+        Args:
+            index (int): The slot to change.
+            address (Address): Its new finger, or None.
+
+        Returns:
+            _FingerTable: The new table (this one if nothing changed).
+        """
+        old = self[index]
+        if old == address:
+            return self
+        slots = list(self)
+        slots[index] = address
+        table = tuple.__new__(type(self), slots)
+        table._refs = dict(self._refs)
+        table._keys = list(self._keys)
+        table._by_key = dict(self._by_key)
+        if old is not None:
+            table._release(old)
+        if address is not None:
+            table._retain(address)
+        return table
+
+
+
+    def preceding(self, start, id, count=1, exclude=()):
+        """
+        Lists the fingers strictly between two ids, closest to `id` first.
+
+        Keys are sorted by absolute value, so the search starts at the last
+        key before `id` and walks back around the ring until it leaves the
+        interval (start, id).
+
+        Args:
+            start (int): The owning node's key (excluded).
+            id (int): Identifier the fingers should precede (excluded).
+            count (int): Maximum number of fingers to return.
+            exclude (collection): Keys of nodes to leave out.
+
+        Returns:
+            list: Up to `count` distinct finger Addresses.
+        """
+        keys, by_key = self._keys, self._by_key
+        fingers = []
+        i = bisect.bisect_left(keys, id)
+        # Negative indices wrap around past the smallest key
+        for j in range(i - 1, i - 1 - len(keys), -1):
+            key = keys[j]
+            if not between(start, id, key):
+                break # every key further back is outside too
+            if key in exclude:
+                continue
+            fingers.append(by_key[key])
+            if len(fingers) == count:
+                break
+        return fingers
+
+
+
+    def _retain(self, address):
+        refs = self._refs.get(address, 0)
+        self._refs[address] = refs + 1
+        if refs == 0:
+            if address.key not in self._by_key:
+                bisect.insort(self._keys, address.key)
+            self._by_key[address.key] = address
+
+
+
+    def _release(self, address):
+        refs = self._refs[address] - 1
+        if refs:
+            self._refs[address] = refs
+            return
+        del self._refs[address]
+        if self._by_key.get(address.key) != address:
+            return
+        # Another address may share the key; fall back to it
+        other = next((a for a in self._refs if a.key == address.key), None)
+        if other is not None:
+            self._by_key[address.key] = other
+            return
+        del self._by_key[address.key]
+        del self._keys[bisect.bisect_left(self._keys, address.key)]
@@ -0,0 +1,82 @@
+# log.py
+
+import logging
+import logging.handlers
+import queue
+import sys
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    A QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler formats each record before queueing it, which puts
+    the string building back on the thread that logged. Records here are
+    queued as they are; the listener's handlers format them.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+
+class _AsyncLogging:
+    """
+    Moves a logger's output onto a background thread.
+
+    While started, the logger's records go onto an in-memory queue and a
+    QueueListener thread hands them to the real handlers, so request
+    threads never block on console or file I/O.
+    """
+
+    def __init__(self, logger, handlers):
+        self._logger = logger
+        self._queue = queue.SimpleQueue()
+        self._handler = _DeferredQueueHandler(self._queue)
+        self._listener = logging.handlers.QueueListener(
+            self._queue, *handlers, respect_handler_level=True
+        )
+        self._propagate = logger.propagate
+
+
+
+    def start(self):
+        self._listener.start()
+        self._logger.addHandler(self._handler)
+        # The listener's handlers replace any the root logger would use
+        self._logger.propagate = False
+
+
+
+    def stop(self):
+        """Detaches from the logger and flushes what is still queued."""
+        self._logger.removeHandler(self._handler)
+        self._logger.propagate = self._propagate
+        self._listener.stop()
+
+
+
+def start_async_logging(*handlers, name='chord', level=logging.INFO):
+    """
+    Sends a logger's records to handlers on a background thread.
+
+    Args:
+        *handlers (logging.Handler): Where records end up. Defaults to a
+            StreamHandler on stderr.
+        name (str): Logger to move off the calling threads.
+        level (int): Level to set on the logger, or None to leave it.
+
+    Returns:
+        _AsyncLogging: Call its stop() to detach and flush.
+    """
+    if not handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s %(name)s: %(message)s'
+        ))
+        handlers = (handler,)
+    logger = logging.getLogger(name)
+    if level is not None:
+        logger.setLevel(level)
+    async_logging = _AsyncLogging(logger, handlers)
+    async_logging.start()
+    return async_logging
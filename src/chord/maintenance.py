@@ -0,0 +1,201 @@
+# maintenance.py
+
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class _Task:
+    """A periodic task and its current schedule."""
+
+    __slots__ = ('name', 'fn', 'base', 'period', 'due', 'runs')
+
+    def __init__(self, name, fn, base):
+        self.name = name
+        self.fn = fn
+        self.base = base
+        self.period = base
+        self.due = 0.0
+        self.runs = 0
+
+
+
+class _Maintenance:
+    """
+    Runs a node's periodic maintenance tasks on one background thread.
+
+    Each task has its own base period. After every run the routing state
+    is compared with the last state seen. If it is unchanged, that task's
+    period grows by `backoff`, up to `max_slowdown` times its base. If it
+    has changed (the successor, predecessor or a finger moved, whether
+    through this task or an incoming notify), every task drops back to
+    its base period. So a quiet ring is probed rarely, and a ring in
+    churn is repaired at full speed.
+
+    Every wait is randomized by +/- `jitter` (a fraction of the period),
+    so nodes started together don't probe each other in lockstep.
+    """
+
+    def __init__(self, tasks, state, jitter=0.25, backoff=1.5, max_slowdown=8.0,
+                 durations=None):
+        """
+        Args:
+            tasks (list): (name, callable, base period in seconds) tuples.
+            state (callable): Returns a comparable snapshot of the routing
+                state, used to detect topology changes.
+            jitter (float): Fraction of each period to randomize by.
+            backoff (float): Factor to stretch a period by while stable.
+            max_slowdown (float): Cap on a period, as a multiple of its base.
+            durations (_Histogram): Optional histogram to record each run's
+                duration in, labelled by task name.
+        """
+        self._tasks = [_Task(name, fn, base) for name, fn, base in tasks]
+        self._state = state
+        self._jitter = jitter
+        self._backoff = backoff
+        self._max_slowdown = max_slowdown
+        self._durations = durations
+        self._last_state = None
+        self._wakeup = threading.Condition()
+        self._stopped = True
+        self._thread = None
+
+
+
+    def start(self):
+        """Starts running the tasks, each one right away."""
+        if not self._begin():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name='chord-maintenance', daemon=True
+        )
+        self._thread.start()
+
+
+
+    def stop(self, timeout=None):
+        """
+        Stops the scheduler and waits for a running task to finish.
+
+        Args:
+            timeout (float): Seconds to wait for the thread to exit.
+        """
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+
+
+    def is_running(self):
+        return not self._stopped
+
+
+
+    def reset(self):
+        """
+        Returns every task to its base period, e.g. after a known change.
+        """
+        with self._wakeup:
+            self._speed_up(time.monotonic())
+            self._wakeup.notify()
+
+
+
+    def stats(self):
+        """
+        Reports the current schedule.
+
+        Returns:
+            dict: task name -> dict with period (seconds) and runs.
+        """
+        with self._wakeup:
+            return {
+                task.name: {'period': task.period, 'runs': task.runs}
+                for task in self._tasks
+            }
+
+
+
+    def _begin(self):
+        """
+        Marks the scheduler running with every task due now.
+
+        Returns:
+            bool: False if it was already running.
+        """
+        with self._wakeup:
+            if not self._stopped:
+                return False
+            self._stopped = False
+            now = time.monotonic()
+            for task in self._tasks:
+                task.period = task.base
+                task.due = now
+        self._last_state = self._state()
+        return True
+
+
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while True:
+                    if self._stopped:
+                        return
+                    task = self._next_task()
+                    delay = task.due - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._wakeup.wait(delay)
+
+            started = time.monotonic()
+            try:
+                task.fn()
+            except Exception as e:
+                logger.warning("Maintenance task %s failed: %s", task.name, e)
+            self._finish(task, started)
+
+
+
+    def _next_task(self):
+        """Returns the task due soonest. Call with the lock held."""
+        return min(self._tasks, key=lambda t: t.due)
+
+
+
+    def _finish(self, task, started):
+        """
+        Records a run of a task that started at `started`, and schedules
+        its next run by whether the routing state changed.
+        """
+        if self._durations is not None:
+            self._durations.observe(time.monotonic() - started, task.name)
+        state = self._state()
+
+        with self._wakeup:
+            task.runs += 1
+            now = time.monotonic()
+            if state != self._last_state:
+                self._last_state = state
+                self._speed_up(now)
+            else:
+                task.period = min(task.period * self._backoff,
+                                  task.base * self._max_slowdown)
+            task.due = now + self._jittered(task.period)
+
+
+
+    def _speed_up(self, now):
+        for task in self._tasks:
+            task.period = task.base
+            task.due = min(task.due, now + self._jittered(task.base))
+
+
+
+    def _jittered(self, period):
+        return period * random.uniform(1 - self._jitter, 1 + self._jitter)
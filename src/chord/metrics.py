@@ -0,0 +1,185 @@
+# metrics.py
+
+import bisect
+import threading
+
+# Upper bounds of the histogram buckets, Prometheus style (each bucket
+# counts observations <= its bound; an implicit +Inf bucket takes the rest)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+HOP_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 12, 16, 24, 32)
+
+class _Counter:
+    """
+    A monotonically increasing count, one series per label combination.
+
+    Attributes:
+        name (str): Metric name.
+        help (str): One-line description.
+        labels (tuple): Label names, matched positionally by `inc`.
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {} # label values -> count
+        self._lock = threading.Lock()
+
+
+
+    def inc(self, *labels, amount=1):
+        """Adds `amount` to the series for the given label values."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+
+    def snapshot(self):
+        """Returns label values -> count."""
+        with self._lock:
+            return dict(self._values)
+
+
+
+class _Histogram:
+    """
+    A distribution of observed values in fixed buckets, one series per
+    label combination.
+
+    Attributes:
+        name (str): Metric name.
+        help (str): One-line description.
+        labels (tuple): Label names, matched positionally by `observe`.
+        bounds (tuple): Sorted bucket upper bounds.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), bounds=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.bounds = tuple(bounds)
+        # label values -> [count per bucket..., +Inf count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+
+
+    def observe(self, value, *labels):
+        """Records one value in the series for the given label values."""
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.bounds) + 2)
+            series[i] += 1
+            series[-1] += value
+
+
+
+    def snapshot(self):
+        """
+        Returns label values -> dict with buckets, sum and count.
+
+        buckets is a list of (upper bound, cumulative count) pairs ending
+        with (inf, count).
+        """
+        with self._lock:
+            series = {labels: list(s) for labels, s in self._series.items()}
+        result = {}
+        for labels, s in series.items():
+            buckets = []
+            total = 0
+            for bound, n in zip(self.bounds + (float('inf'),), s):
+                total += n
+                buckets.append((bound, total))
+            result[labels] = {'buckets': buckets, 'sum': s[-1], 'count': total}
+        return result
+
+
+
+class _Metrics:
+    """
+    An in-process registry of counters and histograms.
+
+    Metrics are created on first use and live for the life of the
+    registry. Updates take one short per-metric lock and allocate nothing
+    once a series exists, so they're cheap enough for every request.
+    """
+
+    def __init__(self):
+        self._metrics = {} # name -> _Counter or _Histogram
+        self._lock = threading.Lock()
+
+
+
+    def counter(self, name, help, labels=()):
+        """
+        Returns the counter with this name, creating it if needed.
+
+        Args:
+            name (str): Metric name.
+            help (str): One-line description.
+            labels (tuple): Label names.
+
+        Returns:
+            _Counter: The counter.
+        """
+        return self._get(_Counter, name, help, labels)
+
+
+
+    def histogram(self, name, help, labels=(), bounds=LATENCY_BUCKETS):
+        """
+        Returns the histogram with this name, creating it if needed.
+
+        Args:
+            name (str): Metric name.
+            help (str): One-line description.
+            labels (tuple): Label names.
+            bounds (tuple): Sorted bucket upper bounds.
+
+        Returns:
+            _Histogram: The histogram.
+        """
+        return self._get(_Histogram, name, help, labels, bounds)
+
+
+
+    def snapshot(self):
+        """
+        Reads every metric at once.
+
+        Returns:
+            dict: name -> dict with type ('counter' or 'histogram'), help,
+                labels (label names) and values (label values -> a count,
+                or for histograms a dict with buckets, sum and count).
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: {
+                'type': metric.kind,
+                'help': metric.help,
+                'labels': metric.labels,
+                'values': metric.snapshot(),
+            }
+            for metric in metrics
+        }
+
+
+
+    def _get(self, cls, name, *args):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = cls(name, *args)
+        if not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is already a {metric.kind}")
+        return metric
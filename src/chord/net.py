@@ -1,26 +1,146 @@
+import itertools
+import logging
+import selectors
 import socket
-import sys
+import struct
 import threading
+import time
+from concurrent.futures import Future
+
+from . import protocol
+from .metrics import _Metrics
+from .pool import _ConnectionPool
+from .rtt import _RttTable
+from .workers import _WorkerPool
+
+logger = logging.getLogger(__name__)
+
+# Requests whose answer depends on other nodes (a recursive lookup waits
+# for every later hop), so one peer's RTT says little about how long they
+# take. They get a fixed timeout instead of an RTT-derived one.
+DEFAULT_METHOD_TIMEOUTS = {
+    'FIND_SUCCESSOR': 5.0,
+    'FIND_SUCCESSORS': 5.0,
+    'TRACE_SUCCESSOR': 5.0,
+}
+
+# Requests that may be sent over UDP. They're answered on the listener
+# thread, so they must be cheap and never contact other nodes.
+UDP_METHODS = frozenset({'PING', 'GET_PREDECESSOR'})
+
+# BUSY replies waiting for a client to read them. A client that lets
+# this much pile up isn't reading at all, and is dropped.
+MAX_OUTBOX = 64 * 1024
+
+class RequestTimeout(Exception):
+    """
+    A request was sent but not answered in time.
+
+    Not an OSError: the destination was reachable, and for requests that
+    wait on other nodes the delay may not be its fault.
+    """
+
+
+
+class _ServerConnection:
+    """
+    Server-side state for one accepted client connection.
+
+    Attributes:
+        sock (socket): The accepted socket.
+        buffer (bytearray): Received bytes not yet parsed into frames.
+        send_lock (Lock): Serializes responses written by worker threads.
+        outbox (bytearray): BUSY replies queued by the listener thread,
+            written when the socket is writable or before the next response.
+        outbox_lock (Lock): Guards outbox; only ever held briefly.
+        last_active (float): Monotonic time data was last received.
+    """
+
+    __slots__ = ('sock', 'buffer', 'send_lock', 'outbox', 'outbox_lock',
+                 'last_active')
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = bytearray()
+        self.send_lock = threading.Lock()
+        self.outbox = bytearray()
+        self.outbox_lock = threading.Lock()
+        self.last_active = time.monotonic()
+
+
+
 
 class _Net:
 
-    def __init__(self, ip, port, request_handler):
+    def __init__(self, ip, port, request_handler,
+                 max_connections_per_peer=4, idle_timeout=30.0,
+                 workers=16, queue_size=128, backlog=128, udp=False,
+                 method_timeouts=None, initial_timeout=1.0,
+                 min_timeout=0.2, max_timeout=5.0, metrics=None):
         self._ip = ip
         self._port = port
         self._request_handler = request_handler
         self._running = False
-        self._network_thread = None
+        self.server_socket = None
+        self.network_thread = None
+
+        # Outbound connections are kept open and reused between requests
+        self._idle_timeout = idle_timeout
+        self._pool = _ConnectionPool(max_connections_per_peer, idle_timeout)
+        self._request_ids = itertools.count(1)
+
+        # Timeouts adapt to each peer's measured round-trip time
+        self._rtt = _RttTable(initial_timeout, min_timeout, max_timeout)
+        self._method_timeouts = dict(DEFAULT_METHOD_TIMEOUTS)
+        if method_timeouts:
+            self._method_timeouts.update(method_timeouts)
+
+        # Inbound requests are handled by a fixed pool of workers
+        self._backlog = backlog
+        self._workers = _WorkerPool(workers, queue_size)
+        self._connections = {} # fileno -> _ServerConnection
+        self._selector = None
+        self._wakeup = None
+
+        # Optional datagram endpoint for cheap liveness/status probes
+        self._udp = udp
+        self.udp_socket = None
+
+        # Per-method traffic and latency, shared with the owning node
+        self.metrics = metrics or _Metrics()
+        self._requests_sent = self.metrics.counter(
+            'chord_rpc_requests_total', 'Requests sent, by method.', ('method',))
+        self._request_failures = self.metrics.counter(
+            'chord_rpc_failures_total',
+            'Requests sent that got no usable answer, by method and reason '
+            '(timeout, refused, busy, cancelled or error).', ('method', 'reason'))
+        self._request_latency = self.metrics.histogram(
+            'chord_rpc_latency_seconds',
+            'Time from sending a request to its answer, by method and peer.',
+            ('method', 'peer'))
+        self._requests_handled = self.metrics.counter(
+            'chord_requests_handled_total', 'Requests received, by method.',
+            ('method',))
+        self._handling_time = self.metrics.histogram(
+            'chord_request_handling_seconds',
+            'Time spent handling a received request, by method.', ('method',))
 
     def start(self):
         """
         Starts the Chord node's network listener.
 
-        Begins accepting incoming network connections in a separate thread.
+        Begins accepting incoming network connections in a separate thread,
+        and starts the workers that handle requests.
         """
         self._running = True
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server_socket.bind((self._ip, self._port))
-        self.server_socket.listen(5)
+        self.server_socket.listen(self._backlog)
+        self._wakeup = socket.socketpair()
+        if self._udp:
+            self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.udp_socket.bind((self._ip, self._port))
+        self._workers.start()
         
         # Start network listener in a separate thread
         self.network_thread = threading.Thread(
@@ -38,58 +158,351 @@ class _Net:
         Closes the server socket and waits for the network thread to terminate.
         """
         self._running = False
-        if self.server_socket:
-            self.server_socket.close()
+        if self._wakeup:
+            # wakes up the listener thread blocked in select()
+            try:
+                self._wakeup[1].send(b'\0')
+            except OSError:
+                pass
         if self.network_thread:
             self.network_thread.join()
+        if self.server_socket:
+            self.server_socket.close()
+        if self.udp_socket:
+            self.udp_socket.close()
+            self.udp_socket = None
+        if self._wakeup:
+            for sock in self._wakeup:
+                sock.close()
+            self._wakeup = None
+        self._workers.stop()
+        self._pool.close_all()
+
+
+
+    def stats(self):
+        """
+        Reports the load on this node's request handling.
+
+        Returns:
+            dict: Worker pool stats (workers, active, queue_depth,
+                queue_capacity, submitted, completed, failed, rejected)
+                plus the number of open inbound connections.
+        """
+        stats = self._workers.stats()
+        stats['connections'] = len(self._connections)
+        return stats
 
 
 
-    def send_request(self, dest_node, method, *args):
+    def send_request(self, dest_node, method, *args, timeout=None):
         """
-        Sends a network request to a specific node.
+        Sends a network request to a specific node and waits for the answer.
 
         Args:
             dest_node (Address): The network address to send the request to
             method (str): The method/request type to invoke
             *args: Variable arguments to pass with the request
+            timeout (float): Seconds to wait for the answer. Defaults to
+                `request_timeout(dest_node, method)`.
 
         Returns:
-            The response from the target node, or None if communication fails
+            The response from the target node, or None if communication
+                fails. protocol.BUSY if the node was too loaded to handle it.
         """
         try:
-            # Create a socket with a timeout
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                # Set a reasonable timeout (e.g., 5 seconds)
-                sock.settimeout(5)
-                
-                # Connect to the target node
-                sock.connect((dest_node.ip, dest_node.port))
-                
-                # Prepare the request
-                # Convert all args to strings and join with ':'
-                request_args = ':'.join(str(arg) for arg in args)
-                request = f"{method}:{request_args}"
-                if (method == "TRACE_SUCCESSOR"):
-                    print ('[SENDING TRACE REQ]', request)
-                # Send the request
-                sock.send(request.encode())
-                
-                # Receive the response
-                response = sock.recv(1024).decode()
-                
-                return response
-        
-        except socket.timeout:
-            print("Request timed out", file=sys.stderr)
-            return None
+            return self.request(dest_node, method, *args, timeout=timeout)
+        except RequestTimeout:
+            logger.info("Request to %s timed out", dest_node)
         except ConnectionRefusedError:
-            print("Connection refused", file=sys.stderr)
-            return None
+            logger.info("Connection to %s refused", dest_node)
         except Exception as e:
-            print(f"Network request error: {e}", file=sys.stderr)
-            return None
+            logger.warning("Network request error: %s", e)
+        return None
+
+
+
+    def request(self, dest_node, method, *args, timeout=None):
+        """
+        Sends a network request and waits for the answer, like
+        `send_request`, but raises on failure.
+
+        The exception says whether the node itself couldn't be reached or
+        merely didn't answer in time. For a request that other nodes help
+        answer (a recursive lookup), only the former says anything about
+        the destination.
+
+        Args:
+            dest_node (Address): The network address to send the request to
+            method (str): The method/request type to invoke
+            *args: Variable arguments to pass with the request
+            timeout (float): Seconds to wait for the answer. Defaults to
+                `request_timeout(dest_node, method)`.
+
+        Returns:
+            The response from the target node, or protocol.BUSY if it was
+                too loaded to handle it.
+
+        Raises:
+            RequestTimeout: If the request was sent but not answered in time.
+            OSError: If the node couldn't be reached: the connection was
+                refused, reset, or timed out while connecting.
+            ValueError: If the request or its answer can't be encoded.
+        """
+        # Prepare the request
+        request_id = next(self._request_ids) & 0xFFFFFFFF
+        self._requests_sent.inc(method)
+        try:
+            request = protocol.encode_request(method, request_id, args)
+        except ValueError:
+            self._request_failures.inc(method, 'error')
+            raise
+        if method == 'TRACE_SUCCESSOR':
+            logger.debug("Sending %s to %s: %s", method, dest_node, args)
+
+        # A pooled connection may have been closed by the peer while idle.
+        # If a reused connection fails before answering, retry once on a
+        # fresh connection.
+        adaptive = timeout is None and method not in self._method_timeouts
+        if timeout is None:
+            timeout = self.request_timeout(dest_node, method)
+        for attempt in range(2):
+            reused = False
+            try:
+                future, conn, reused = self._submit(dest_node, request_id, request)
+                sent = time.monotonic()
+                try:
+                    response = future.result(timeout=timeout)
+                except TimeoutError:
+                    conn.forget(request_id)
+                    if adaptive:
+                        self._rtt.timed_out(dest_node)
+                    self._request_failures.inc(method, 'timeout')
+                    raise RequestTimeout(
+                        f"No answer to {method} from {dest_node} in {timeout:.2f}s"
+                    ) from None
+            except ConnectionRefusedError:
+                self._request_failures.inc(method, 'refused')
+                raise
+            except TimeoutError:
+                # Timed out connecting
+                if adaptive:
+                    self._rtt.timed_out(dest_node)
+                self._request_failures.inc(method, 'timeout')
+                raise
+            except OSError:
+                if reused and attempt == 0:
+                    continue
+                self._request_failures.inc(method, 'error')
+                raise
+            except RequestTimeout:
+                raise
+            except Exception:
+                self._request_failures.inc(method, 'error')
+                raise
+
+            elapsed = time.monotonic() - sent
+            # Only first attempts are timed (Karn's algorithm)
+            if adaptive and attempt == 0:
+                self._rtt.observe(dest_node, elapsed)
+            self._request_latency.observe(elapsed, method, _peer(dest_node))
+            if response is protocol.BUSY:
+                self._request_failures.inc(method, 'busy')
+            return response
+
+
+
+    def submit_request(self, dest_node, method, *args):
+        """
+        Sends a network request without waiting for the answer.
+
+        Many requests can be outstanding at once, including several to the
+        same node over one connection; responses are matched by request id
+        and may arrive in any order.
+
+        Args:
+            dest_node (Address): The network address to send the request to
+            method (str): The method/request type to invoke
+            *args: Variable arguments to pass with the request
+
+        Returns:
+            Future: Resolves to the response from the target node (or
+                protocol.BUSY if it was too loaded to handle it). Fails
+                with OSError if the request can't be delivered, or
+                ValueError if it can't be encoded. Callers choose their
+                own timeout via `future.result(timeout)`, and should
+                `cancel()` a future they stop waiting for.
+        """
+        request_id = next(self._request_ids) & 0xFFFFFFFF
+        self._requests_sent.inc(method)
+        try:
+            request = protocol.encode_request(method, request_id, args)
+            future, _, _ = self._submit(dest_node, request_id, request)
+        except (OSError, ValueError) as e:
+            reason = 'refused' if isinstance(e, ConnectionRefusedError) else 'error'
+            self._request_failures.inc(method, reason)
+            future = Future()
+            future.set_exception(e)
+            return future
+
+        adaptive = method not in self._method_timeouts
+        sent = time.monotonic()
+        def observe(done):
+            # Callers cancel the requests they stop waiting for
+            if done.cancelled():
+                self._request_failures.inc(method, 'cancelled')
+                return
+            if done.exception():
+                self._request_failures.inc(method, 'error')
+                return
+            elapsed = time.monotonic() - sent
+            if adaptive:
+                self._rtt.observe(dest_node, elapsed)
+            self._request_latency.observe(elapsed, method, _peer(dest_node))
+            if done.result() is protocol.BUSY:
+                self._request_failures.inc(method, 'busy')
+        future.add_done_callback(observe)
+        return future
+
+
+
+    def request_timeout(self, dest_node, method):
+        """
+        Chooses how long to wait for a request to a destination.
+
+        Methods with a per-method override use it. Everything else uses a
+        timeout derived from the smoothed RTT and variance measured to
+        that destination.
+
+        Args:
+            dest_node (Address): Where the request goes.
+            method (str): The method being invoked.
+
+        Returns:
+            float: Timeout in seconds.
+        """
+        override = self._method_timeouts.get(method)
+        if override is not None:
+            return override
+        return self._rtt.timeout(dest_node)
+
+
+
+    def rtt(self, dest_node):
+        """
+        Returns the smoothed round-trip time to a destination in seconds,
+        or None if nothing has been measured yet.
+        """
+        return self._rtt.srtt(dest_node)
+
+
+
+    def rtt_stats(self):
+        """
+        Reports the RTT estimate for every destination contacted so far.
+
+        Returns:
+            dict: "ip:port" -> dict with srtt, rttvar, rto, samples and
+                timeouts (times in seconds).
+        """
+        return self._rtt.stats()
+
+
+
+    def _submit(self, dest_node, request_id, request):
+        """
+        Writes a request on a pooled connection.
+
+        Returns:
+            tuple: (Future, _PooledConnection, bool) the response future,
+                the connection used and whether it was already open.
+        """
+        # A handshake takes one round trip, so the RTT-based timeout
+        # bounds how long a dead peer can stall us.
+        connect_timeout = self._rtt.timeout(dest_node)
+        for attempt in range(2):
+            conn, reused = self._pool.acquire(dest_node, connect_timeout)
+            try:
+                return conn.send(request_id, request), conn, reused
+            except OSError:
+                # The connection died while idle; try a fresh one
+                if not reused or attempt:
+                    raise
+
+
+
+    def ping(self, dest_node, timeout=0.25, retries=3):
+        """
+        Checks whether a node is alive.
+
+        With UDP enabled, sends up to `retries` PING datagrams and waits
+        `timeout` seconds for each, so a lost packet costs one retry rather
+        than a failed check. If none are answered (or UDP is disabled) the
+        check falls back to a PING over TCP, which also covers peers that
+        don't run the UDP endpoint.
+
+        Args:
+            dest_node (Address): The node to check.
+            timeout (float): Seconds to wait for each datagram reply.
+            retries (int): Number of datagrams to send.
+
+        Returns:
+            bool: True if the node answered ALIVE (or BUSY: it's
+                overloaded, not down), False otherwise.
+        """
+        if self._udp and self.send_datagram(
+                dest_node, 'PING', timeout=timeout, retries=retries) == 'ALIVE':
+            return True
+        response = self.send_request(dest_node, 'PING')
+        return response == 'ALIVE' or response is protocol.BUSY
+
+
 
+    def send_datagram(self, dest_node, method, *args, timeout=0.25, retries=3):
+        """
+        Sends a small request as a UDP datagram and waits for the reply.
+
+        Each attempt carries its own sequence number (the frame's request
+        id). A late reply to an earlier attempt is still accepted; replies
+        to anything else are ignored.
+
+        Args:
+            dest_node (Address): The node to send the datagram to.
+            method (str): One of UDP_METHODS.
+            *args: Arguments to pass with the request.
+            timeout (float): Seconds to wait for each reply.
+            retries (int): Number of attempts.
+
+        Returns:
+            The response from the target node, or None if none arrived.
+        """
+        sent = set()
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.settimeout(timeout)
+                for _ in range(retries):
+                    seq = next(self._request_ids) & 0xFFFFFFFF
+                    sent.add(seq)
+                    sock.sendto(protocol.encode_request(method, seq, args),
+                                (dest_node.ip, dest_node.port))
+                    deadline = time.monotonic() + timeout
+                    while True:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        sock.settimeout(remaining)
+                        try:
+                            data = sock.recv(protocol.MAX_DATAGRAM)
+                        except (TimeoutError, ConnectionRefusedError):
+                            break
+                        if len(data) < protocol.HEADER.size:
+                            continue
+                        _, seq, _ = protocol.HEADER.unpack_from(data)
+                        if seq in sent:
+                            return protocol.decode_value(data[protocol.HEADER.size:])
+        except (OSError, ValueError) as e:
+            logger.warning("Datagram request error: %s", e)
+        return None
 
 
 
@@ -97,53 +510,237 @@ class _Net:
         """
         Continuously listens for incoming network connections.
 
-        Accepts client connections and spawns a thread to handle each connection.
+        A single thread accepts connections and reads from all of them.
+        Each complete request frame is handed to the worker pool; if the
+        pool's queue is full, the request is answered with protocol.BUSY
+        instead. BUSY replies are written only when the selector reports
+        the socket writable, so a client that stops reading can't stall
+        this thread.
+        """
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.server_socket, selectors.EVENT_READ)
+        self._selector.register(self._wakeup[0], selectors.EVENT_READ)
+        if self.udp_socket:
+            self._selector.register(self.udp_socket, selectors.EVENT_READ)
+        last_sweep = time.monotonic()
+
+        try:
+            while self._running:
+                for key, events in self._selector.select(timeout=1.0):
+                    if key.fileobj is self.server_socket:
+                        self._accept_connection()
+                    elif key.fileobj is self._wakeup[0]:
+                        continue
+                    elif key.fileobj is self.udp_socket:
+                        self._handle_datagram()
+                    else:
+                        conn = key.data
+                        if events & selectors.EVENT_WRITE:
+                            self._write_outbox(conn)
+                        if (events & selectors.EVENT_READ
+                                and conn.sock.fileno() in self._connections):
+                            self._read_connection(conn)
+
+                # Idle clients are dropped; their pools will reconnect
+                now = time.monotonic()
+                if now - last_sweep >= self._idle_timeout:
+                    last_sweep = now
+                    for conn in list(self._connections.values()):
+                        if now - conn.last_active > self._idle_timeout * 2:
+                            self._close_connection(conn)
+        finally:
+            for conn in list(self._connections.values()):
+                self._close_connection(conn)
+            self._selector.close()
+
+
+
+    def _handle_datagram(self):
+        """
+        Answers one UDP request. Runs on the listener thread, so only
+        UDP_METHODS (cheap, answered locally) are served.
         """
-        while self._running:
+        try:
+            data, sender = self.udp_socket.recvfrom(protocol.MAX_DATAGRAM)
+            opcode, seq, length = protocol.HEADER.unpack_from(data)
+            method = protocol.METHODS.get(opcode)
+            if method not in UDP_METHODS:
+                return
+            args = protocol.decode_values(data[protocol.HEADER.size:])
+            response = self._request_handler(method, args)
+            self.udp_socket.sendto(
+                protocol.encode_response(opcode, seq, response), sender
+            )
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning("Error handling datagram: %s", e)
+
+
+
+    def _accept_connection(self):
+        try:
+            client_socket, address = self.server_socket.accept()
+        except OSError as e:
+            if self._running:
+                logger.warning("Error accepting connection: %s", e)
+            return
+        # Only read once the selector says data is ready; the timeout
+        # bounds how long a worker can block writing a response.
+        client_socket.settimeout(5)
+        conn = _ServerConnection(client_socket)
+        self._connections[client_socket.fileno()] = conn
+        self._selector.register(client_socket, selectors.EVENT_READ, conn)
+
+
+
+    def _read_connection(self, conn):
+        """
+        Reads available data from a client and dispatches complete frames.
+
+        Args:
+            conn (_ServerConnection): The readable connection.
+        """
+        try:
+            data = conn.sock.recv(65536)
+        except OSError:
+            data = b''
+        if not data:
+            self._close_connection(conn)
+            return
+
+        conn.last_active = time.monotonic()
+        conn.buffer += data
+        header_size = protocol.HEADER.size
+        while len(conn.buffer) >= header_size:
+            opcode, request_id, length = protocol.HEADER.unpack_from(conn.buffer)
+            if length > protocol.MAX_PAYLOAD:
+                logger.warning("Dropping connection: frame of %d bytes", length)
+                self._close_connection(conn)
+                return
+            if len(conn.buffer) < header_size + length:
+                break
+            payload = bytes(conn.buffer[header_size:header_size + length])
+            del conn.buffer[:header_size + length]
+
+            if not self._workers.submit(self._handle_request, conn,
+                                        opcode, request_id, payload):
+                busy = protocol.encode_response(opcode, request_id, protocol.BUSY)
+                if not self._queue_busy(conn, busy):
+                    return
+
+
+
+    def _queue_busy(self, conn, frame):
+        """
+        Queues a BUSY reply and asks the selector to report when the
+        client can take it. Runs on the listener thread.
+
+        Returns:
+            bool: False if the client had too much unread and was dropped.
+        """
+        with conn.outbox_lock:
+            if len(conn.outbox) + len(frame) > MAX_OUTBOX:
+                overflow = True
+            else:
+                overflow = False
+                conn.outbox += frame
+        if overflow:
+            logger.warning("Dropping connection: BUSY replies aren't being read")
+            self._close_connection(conn)
+            return False
+        self._selector.modify(conn.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, conn)
+        return True
+
+
+
+    def _write_outbox(self, conn):
+        """
+        Writes what the socket takes of a connection's queued BUSY replies.
+        Runs on the listener thread once the socket is writable.
+        """
+        # A worker holding the lock flushes the outbox before its own
+        # response; don't wait for it.
+        if conn.send_lock.acquire(blocking=False):
             try:
-                client_socket, address = self.server_socket.accept()
-                # Handle each connection in a separate thread
-                threading.Thread(
-                    target=self._handle_connection, 
-                    args=(client_socket,), 
-                    daemon=True
-                ).start()
-            except Exception as e:
-                if self._running:
-                    sys.stderr.write(f"Error accepting connection: {e}\n")
-                    sys.stderr.flush()
-    
+                with conn.outbox_lock:
+                    pending = bytes(conn.outbox)
+                sent = conn.sock.send(pending) if pending else 0
+                with conn.outbox_lock:
+                    del conn.outbox[:sent]
+            except OSError as e:
+                logger.warning("Error sending response: %s", e)
+                self._close_connection(conn)
+                return
+            finally:
+                conn.send_lock.release()
+        with conn.outbox_lock:
+            done = not conn.outbox
+        if done:
+            self._selector.modify(conn.sock, selectors.EVENT_READ, conn)
+
+
+
+    def _close_connection(self, conn):
+        self._connections.pop(conn.sock.fileno(), None)
+        try:
+            self._selector.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+        conn.sock.close()
 
 
-    def _handle_connection(self, client_socket):
+
+    def _handle_request(self, conn, opcode, request_id, payload):
         """
-        Processes an individual network connection.
+        Processes a single request. Runs on a worker thread.
 
         Args:
-            client_socket (socket): The socket connection to handle.
+            conn (_ServerConnection): The connection the request came from.
+            opcode (int): Request opcode.
+            request_id (int): Request id, echoed in the response.
+            payload (bytes): Encoded request arguments.
         """
+        # Parse request
+        method = protocol.METHODS.get(opcode, 'UNKNOWN')
+        started = time.monotonic()
         try:
-            # Receive request
-            request = client_socket.recv(1024).decode()
+            args = protocol.decode_values(payload)
 
-            # Parse request
-            method, *args = request.split(':')
-            
             if method == 'TRACE_SUCCESSOR':
-                print(f"[NET]Received request: {request}", file=sys.stderr)
+                logger.debug("Received %s request: %s", method, args)
 
             # Dispatch to appropriate method
             response = self._request_handler(method, args)
+            frame = protocol.encode_response(opcode, request_id, response)
+        except Exception as e:
+            logger.error("Error handling %s request: %s", method, e)
+            response = "ERROR"
+            frame = protocol.encode_response(opcode, request_id, response)
 
-            if method == 'TRACE_SUCCESSOR':
-                print(f"[NET]Sent response: {response}", file=sys.stderr)
+        if method == 'TRACE_SUCCESSOR':
+            logger.debug("Sending %s response: %s", method, response)
 
-            # Send response
-            client_socket.send(str(response).encode())
-        except Exception as e:
-            sys.stderr.write(f"Error handling connection: {e}\n")
-            sys.stderr.flush()
-        finally:
-            client_socket.close()
-    
-    
+        self._requests_handled.inc(method)
+        self._handling_time.observe(time.monotonic() - started, method)
+
+        # Send response
+        self._send_response(conn, frame)
+
+
+
+    def _send_response(self, conn, frame):
+        try:
+            with conn.send_lock:
+                # BUSY replies queued earlier go first, so frames never
+                # interleave on the wire
+                with conn.outbox_lock:
+                    pending = bytes(conn.outbox)
+                    conn.outbox.clear()
+                conn.sock.sendall(pending + frame if pending else frame)
+        except OSError as e:
+            logger.warning("Error sending response: %s", e)
+
+
+
+def _peer(address):
+    """Returns the "ip:port" label for a peer, as used by rtt_stats."""
+    return f'{address.ip}:{address.port}'
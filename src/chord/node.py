@@ -1,10 +1,24 @@
 # node.py
-import sys
+import bisect
+import collections
 import threading
 import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
 
 from .address import Address
-from .net import _Net
+from .cache import _LookupCache
+from .exporter import _MetricsServer, render
+from .fingers import _FingerTable
+from .maintenance import _Maintenance
+from .metrics import HOP_BUCKETS, _Metrics
+from .net import RequestTimeout, _Net
+from .protocol import BUSY
+from .ring import get_ring
+from .routing import _RoutingState
+from .singleflight import _SingleFlight
+
+logger = logging.getLogger(__name__)
 
 class Node:
     """Implements a Chord distributed hash table node.
@@ -23,33 +37,164 @@ class Node:
     Attributes:
         address (Address): node address info (key, ip, port).
         successor (Address): The next node in the Chord ring.
+        successor_list (tuple): The next few nodes in the ring, successor
+            first, used to fail over when the successor dies.
         predecessor (Address): The previous node in the Chord ring.
-        finger_table (list): Routing table for efficient lookup.
+        finger_table (tuple): Routing table for efficient lookup, a
+            `_FingerTable` that keeps the sorted index routing searches.
+
+    The predecessor, successor list and finger table live in one immutable
+    `_RoutingState`. Readers use the current snapshot without locking;
+    every change builds a new snapshot under a lock and swaps it in, so
+    readers never see a torn update. Assigning predecessor, successor_list
+    or finger_table swaps in a new snapshot; single fingers are changed
+    with `_set_finger`.
     """
 
-    def __init__(self, ip, port):
+    def __init__(self, ip, port, udp=False, cache_size=0, cache_ttl=30.0,
+                 lookup_mode='recursive', lookup_retries=1, max_hops=None,
+                 lookup_alpha=3, successor_list_size=4,
+                 proximity_fingers=False, m=Address._M):
         """
         Initializes a new Chord node.
 
         Args:
             ip (str): IP address for the node.
             port (int): Port number to listen on.
+            udp (bool): Also answer PING probes over UDP on the same port,
+                and use UDP for this node's own liveness checks.
+            cache_size (int): Number of lookup results to cache (by owner).
+                0 disables the cache.
+            cache_ttl (float): Seconds a cached lookup result stays valid.
+            lookup_mode (str): 'recursive' forwards a lookup to the next hop
+                and waits for it to answer. 'iterative' asks each hop for
+                its closest preceding finger and drives the walk from
+                this node. 'parallel' is iterative, but queries the
+                `lookup_alpha` best candidates at each step (see `lookup`).
+            lookup_retries (int): Iterative mode: extra attempts at a hop
+                before routing around it.
+            max_hops (int): Iterative and parallel modes: give up after
+                this many hops. Defaults to twice the identifier width.
+            lookup_alpha (int): Parallel mode: candidates queried per step.
+            successor_list_size (int): Number of successors to track.
+            proximity_fingers (bool): Let `fix_fingers` pick, among the
+                nodes that are valid for a finger's interval, the one with
+                the lowest measured round-trip time instead of always the
+                first.
+            m (int): Identifier width of the ring in bits, up to 160. Every
+                node in a ring must use the same width.
         """
+        if lookup_mode not in ('recursive', 'iterative', 'parallel'):
+            raise ValueError(f"Unknown lookup mode: {lookup_mode}")
 
-        self.address = Address(ip, port)
+        self._ring = get_ring(m)
+        self.address = Address(ip, port, m)
         
         # Network topology management
-        self.predecessor = None
-        self.finger_table = [None] * Address._M
+        self._routing = _RoutingState(None, (), _FingerTable([None] * m))
+        self._routing_lock = threading.Lock() # serializes routing writers
+        # Nodes recently forgotten, numbered, so stabilize can tell which
+        # failed while its requests were in flight
+        self._forgets = 0
+        self._forgotten = collections.deque(maxlen=64) # (number, Address)
+        self._successor_list_size = successor_list_size
         self._next = 0 # for fix_fingers (iterating through finger_table)
         
         # Networking
-        self._net = _Net(ip, port, self._process_request)
+        self._metrics = _Metrics()
+        self._net = self._create_net(ip, port, udp)
+        self._lookups_done = self._metrics.counter(
+            'chord_lookups_total',
+            'Successor lookups, by mode and how they were answered '
+            '(local, cache, remote or failed).', ('mode', 'source'))
+        self._lookup_time = self._metrics.histogram(
+            'chord_lookup_seconds',
+            'Time to answer a successor lookup remotely, by mode.', ('mode',))
+        self._lookup_hops = self._metrics.histogram(
+            'chord_lookup_hops',
+            'Hops taken by iterative and parallel lookups that succeeded.',
+            ('mode',), bounds=HOP_BUCKETS)
+        self._maintenance_time = self._metrics.histogram(
+            'chord_maintenance_seconds',
+            'Duration of each maintenance task run, by task.', ('task',))
+
+        # Concurrent lookups for the same id share one outbound request
+        self._lookups = _SingleFlight()
+        self._cache = (_LookupCache(cache_size, cache_ttl, self._ring)
+                       if cache_size else None)
+
+        self._lookup_mode = lookup_mode
+        self._lookup_retries = lookup_retries
+        self._max_hops = max_hops or 2 * m
+        self._lookup_alpha = lookup_alpha
+        self._proximity_fingers = proximity_fingers
+        self._maintenance = None
+        self._metrics_server = None
+        self._last_lookup = None # (finger, start, owner) of fix_fingers' last lookup
         self.is_running = False
         
+    @property
+    def predecessor(self):
+        return self._routing.predecessor
+
+    @predecessor.setter
+    def predecessor(self, address):
+        self._update_routing(predecessor=address)
+
+    @property
+    def successor_list(self):
+        return self._routing.successor_list
+
+    @successor_list.setter
+    def successor_list(self, successors):
+        self._update_routing(successor_list=successors)
+
+    @property
+    def finger_table(self):
+        return self._routing.finger_table
+
+    @finger_table.setter
+    def finger_table(self, fingers):
+        self._update_routing(finger_table=_FingerTable(fingers))
+
+    def _create_net(self, ip, port, udp):
+        """Builds the transport, recording its traffic in the node's metrics."""
+        return _Net(ip, port, self._process_request, udp=udp,
+                    metrics=self._metrics)
+
     def successor(self):
         """alias for self.finger_table[0]"""
-        return self.finger_table[0]
+        return self._routing.finger_table[0]
+
+    def _update_routing(self, **changes):
+        """Swaps in a routing snapshot with some fields changed."""
+        with self._routing_lock:
+            self._routing = self._routing.replace(**changes)
+
+    def _set_finger(self, index, address):
+        """Swaps in a routing snapshot with one finger changed."""
+        with self._routing_lock:
+            routing = self._routing
+            self._routing = routing.replace(
+                finger_table=routing.finger_table.replace(index, address)
+            )
+
+    def _set_successors(self, successors, **changes):
+        """
+        Swaps in a routing snapshot with a new successor list and its head
+        as finger 0, so readers never see the two disagree. Other fields
+        can be changed in the same snapshot.
+        """
+        with self._routing_lock:
+            self._routing = self._with_successors(self._routing, successors, **changes)
+
+    @staticmethod
+    def _with_successors(routing, successors, **changes):
+        return routing.replace(
+            successor_list=successors,
+            finger_table=routing.finger_table.replace(0, successors[0]),
+            **changes
+        )
 
     def create(self):
         """
@@ -57,25 +202,28 @@ class Node:
 
         The node sets itself as its own successor and initializes the finger table.
         """
-        self.predecessor = None
-        self.finger_table[0] = self.address
+        self._set_successors([self.address], predecessor=None)
         self.start()
         self.fix_fingers()
     
 
 
-    def join(self, known_ip, known_port):
+    def join(self, known_ip, known_port, warm_start=True, use_predecessor=False):
         """
         Joins an existing Chord ring through a known node's IP and port.
 
         Args:
             known_ip (str): IP address of an existing node in the Chord ring.
             known_port (int): Port number of the existing node.
+            warm_start (bool): Fill the whole finger table right away (see
+                `_warm_start`) rather than one entry per fix_fingers call.
+            use_predecessor (bool): Warm start: also seed from the
+                successor's predecessor's fingers.
         """
         self.predecessor = None
         
         # Create an Address object for the known node
-        known_node_address = Address(known_ip, known_port)
+        known_node_address = Address(known_ip, known_port, self._ring.m)
         
         try:
             # Send a find_successor request to the known node for this node's key
@@ -85,89 +233,366 @@ class Node:
                 self.address.key
             )
             
-            if response:
-                self.finger_table[0] = self._parse_address(response)
-                print(f"Node {self.address.key} joined the ring. Successor: {self.successor().key}", file=sys.stderr)
+            if isinstance(response, Address):
+                self._set_successors([response])
+                logger.info("Node %s joined the ring. Successor: %s",
+                            self.address.key, response.key)
             else:
                 raise ValueError("Failed to find successor. Join failed")
             
             self.start()
+            if warm_start:
+                self._warm_start(response, use_predecessor)
             self.fix_fingers()
             
             
         except Exception as e:
-            print(f"Join failed: {e}")
+            logger.error("Join failed: %s", e)
             raise
 
 
 
+    def _warm_start(self, successor, use_predecessor=False):
+        """
+        Seeds the finger table from the successor's right after joining.
+
+        The successor's fingers (and optionally its predecessor's) are
+        fetched with one GET_FINGERS request each. Each of this node's
+        fingers is first set to the nearest known node at or after its
+        start. Starts up to the successor are exact already. The rest are
+        then resolved with one batched `find_successors`, which the seeded
+        table routes efficiently.
+
+        Args:
+            successor (Address): This node's successor.
+            use_predecessor (bool): Also use the successor's predecessor.
+        """
+        sources = [successor]
+        if use_predecessor:
+            predecessor = self._net.send_request(successor, 'GET_PREDECESSOR')
+            if isinstance(predecessor, Address):
+                sources.append(predecessor)
+
+        known = set(sources)
+        for source in sources:
+            fingers = self._net.send_request(source, 'GET_FINGERS')
+            if isinstance(fingers, list):
+                known.update(f for f in fingers if isinstance(f, Address))
+        known.discard(self.address)
+        if not known:
+            return
+        known = sorted(known, key=lambda a: a.key)
+        keys = [a.key for a in known]
+
+        unresolved = {} # finger start -> finger index
+        reach = self._ring.distance(self.address.key, successor.key)
+        for i in range(1, self._ring.m):
+            start = self._ring.finger_start(self.address.key, i)
+            if self._ring.distance(self.address.key, start) <= reach:
+                self._set_finger(i, successor)
+                continue
+            self._set_finger(i, known[bisect.bisect_left(keys, start) % len(known)])
+            unresolved[start] = i
+
+        if unresolved:
+            owners = self.find_successors(unresolved)
+            for start, i in unresolved.items():
+                if owners.get(start):
+                    self._set_finger(i, owners[start])
+
+
+
     def fix_fingers(self):
         """
         Incrementally updates one entry in the node's finger table.
+
+        Unless proximity selection is on, entries whose start is already
+        known to belong to the successor, or to the node the last lookup
+        found (see `_known_owner`), are filled in locally without a lookup.
+        After the entry is updated, the entries that follow it are filled
+        in the same way until one needs a lookup, which is left for the
+        next call. The last lookup is dropped at the end of every pass
+        over the table, so each pass looks every range up again.
         """
         if not self.successor():  # Ensure there's a valid successor
             return
 
-        # Update the finger table entry pointed to by _next
-        gap = (2 ** self._next) % (2 ** Address._M)
+        looked_up = False
+        for _ in range(self._ring.m):
+            # Update the finger table entry pointed to by _next
+            gap = self._ring.gap(self._next)
+            start = self._ring.finger_start(self.address.key, self._next)
+            #print(f"fixing finger {self._next}. gap is {gap}, start of interval is: {start}")
+
+            responsible_node = (None if self._proximity_fingers
+                                else self._known_owner(start, self._next))
+            if responsible_node is None:
+                if looked_up:
+                    break
+                looked_up = True
+                try:
+                    # Find the successor for this finger's start position
+                    responsible_node = self.find_successor(start)
+                    if responsible_node:
+                        self._last_lookup = (self._next, start, responsible_node)
+                    if responsible_node and self._proximity_fingers and self._next > 0:
+                        responsible_node = self._nearest_finger(start, gap, responsible_node)
+                except Exception as e:
+                    logger.warning("fix_fingers failed for finger %d: %s", self._next, e)
+                    responsible_node = None
+            if responsible_node:
+                self._set_finger(self._next, responsible_node)
+
+            # Move to the next finger table entry, wrapping around if necessary
+            self._next = (self._next + 1) % self._ring.m
+            if self._next == 0:
+                # A node that joined inside the last lookup's range may
+                # never notify us; only a fresh lookup finds it
+                self._last_lookup = None
+
+
+
+    def _known_owner(self, id, finger):
+        """
+        Returns the owner of an id if it's known without a lookup.
 
-        start = self.address.key + gap
-        #print(f"fixing finger {self._next}. gap is {gap}, start of interval is: {start}")
-        
-        try:
-            # Find the successor for this finger's start position
-            responsible_node = self.find_successor(start)
-            self.finger_table[self._next] = responsible_node
-        except Exception as e:
-            print(f"fix_fingers failed for finger {self._next}: {e}")
+        Ids in (n, successor] belong to the successor. A lookup for `start`
+        that found `owner` also shows that every id in [start, owner] is
+        owned by it, so later finger starts in that range reuse it. The
+        finger that was looked up never reuses its own result.
+
+        Args:
+            id (int): A finger start.
+            finger (int): Index of the finger being fixed.
 
-        # Move to the next finger table entry, wrapping around if necessary
-        self._next = (self._next + 1) % Address._M
-    '''
-    def _run_fix_fingers(self, interval=1.0):
+        Returns:
+            Address: The owner, or None if a lookup is needed.
         """
-        Periodically invokes fix_fingers every `interval` seconds.
+        successor = self.successor()
+        n = self.address.key
+        if self._ring.distance(n, id) <= self._ring.distance(n, successor.key):
+            return successor
+        if self._last_lookup:
+            looked_up, start, owner = self._last_lookup
+            if (looked_up != finger and self._ring.distance(start, id)
+                    <= self._ring.distance(start, owner.key)):
+                return owner
+        return None
 
-        Args:
-            interval (float): Time interval between updates (in seconds).
+
+
+    def _nearest_finger(self, start, gap, responsible_node):
         """
-        self.fix_fingers()
-        # Schedule the next execution
-        self._fix_fingers_timer = threading.Timer(interval, self._run_fix_fingers, args=[interval])
-        self._fix_fingers_timer.start()
+        Proximity neighbor selection for one finger.
+
+        Any node in [start, start + gap) can serve as the finger for that
+        interval without changing the O(log N) hop bound, so the candidates
+        are the responsible node and those of its successors that are
+        still in the interval. The one with the lowest smoothed RTT wins;
+        candidates without an estimate yet are pinged to get one.
+
+        Args:
+            start (int): First identifier of the finger's interval.
+            gap (int): Length of the interval.
+            responsible_node (Address): successor(start), the exact finger.
 
-    def start_periodic_tasks(self, interval=1.0):
+        Returns:
+            Address: The chosen finger.
+        """
+        candidates = [responsible_node]
+        successors = self._net.send_request(responsible_node, 'GET_SUCCESSOR_LIST')
+        if isinstance(successors, list):
+            candidates += [s for s in successors if isinstance(s, Address)]
+
+        best, best_rtt = responsible_node, float('inf')
+        for candidate in candidates:
+            if (candidate == self.address or
+                    self._ring.distance(start, candidate.key) >= gap):
+                continue
+            rtt = self._net.rtt(candidate)
+            if rtt is None:
+                if self._net.send_request(candidate, 'PING') != 'ALIVE':
+                    continue
+                rtt = self._net.rtt(candidate)
+            if rtt is not None and rtt < best_rtt:
+                best, best_rtt = candidate, rtt
+        return best
+
+
+
+    def start_maintenance(self, stabilize=0.5, fix_fingers=0.5,
+                          check_predecessor=1.0, jitter=0.25, max_slowdown=8.0):
         """
-        Starts periodic tasks for the node, including fix_fingers.
+        Runs stabilize, fix_fingers and check_predecessor in the background.
+
+        Each runs at its own period. While the routing state keeps
+        changing, every task runs at its given period; once the ring is
+        stable, periods stretch to at most `max_slowdown` times that (see
+        `_Maintenance`). Stopped by `stop_maintenance` or `stop`.
 
         Args:
-            interval (float): Time interval between periodic calls.
+            stabilize (float): Fastest stabilize period in seconds.
+            fix_fingers (float): Fastest fix_fingers period in seconds.
+            check_predecessor (float): Fastest check_predecessor period.
+            jitter (float): Fraction by which each wait is randomized.
+            max_slowdown (float): Cap on how far a period stretches.
         """
-        if self._fix_fingers_timer and self._fix_fingers_timer.is_alive():
-            # Timer is already running, no need to start again
-            print("Periodic tasks are already running.", file=sys.stderr)
+        if self._maintenance and self._maintenance.is_running():
+            logger.warning("Maintenance is already running.")
             return
+        self._maintenance = self._create_maintenance(
+            [('stabilize', self.stabilize, stabilize),
+             ('fix_fingers', self.fix_fingers, fix_fingers),
+             ('check_predecessor', self.check_predecessor, check_predecessor)],
+            jitter=jitter, max_slowdown=max_slowdown
+        )
+        self._maintenance.start()
         self.is_running = True
-        self._run_fix_fingers(interval)
 
-    def stop_periodic_tasks(self):
+
+
+    def _create_maintenance(self, tasks, **kwargs):
+        """Builds the scheduler that runs maintenance on its own thread."""
+        return _Maintenance(tasks, self._routing_state,
+                            durations=self._maintenance_time, **kwargs)
+
+
+
+    def stop_maintenance(self):
         """
-        Stops periodic tasks for the node gracefully.
+        Stops the background maintenance tasks.
         """
-        if self._fix_fingers_timer:
-            self._fix_fingers_timer.cancel()
-            self._fix_fingers_timer = None
+        if self._maintenance:
+            self._maintenance.stop()
+            self._maintenance = None
         self.is_running = False
-    '''
+
+
+
+    def maintenance_stats(self):
+        """
+        Reports the current maintenance schedule.
+
+        Returns:
+            dict: task name -> dict with period (seconds) and runs. Empty if
+                maintenance isn't running.
+        """
+        return self._maintenance.stats() if self._maintenance else {}
+
+
+
+    def metrics_snapshot(self):
+        """
+        Reads this node's metrics: RPC traffic, failures and latency (per
+        method and peer), requests handled, lookups and their hop counts,
+        and maintenance task durations.
+
+        Returns:
+            dict: See `_Metrics.snapshot`.
+        """
+        return self._metrics.snapshot()
+
+
+
+    def start_metrics_server(self, port=0, host='127.0.0.1'):
+        """
+        Serves this node's metrics over HTTP at /metrics, in the Prometheus
+        text format. Stopped by `stop_metrics_server` or `stop`.
+
+        Besides `metrics_snapshot`, a scrape reports the routing table's
+        size and fill, predecessor and successor health, and the load on
+        the request workers.
+
+        Args:
+            port (int): Port to listen on, or 0 for any free port.
+            host (str): Interface to listen on.
+
+        Returns:
+            int: The port the server is listening on.
+        """
+        if self._metrics_server is None:
+            self._metrics_server = _MetricsServer(host, port, self._metrics_text)
+            self._metrics_server.start()
+        return self._metrics_server.port
+
+
+
+    def stop_metrics_server(self):
+        """
+        Stops the metrics HTTP server.
+        """
+        if self._metrics_server:
+            self._metrics_server.stop()
+            self._metrics_server = None
+
+
+
+    def _metrics_text(self):
+        return render(self._metrics.snapshot(), self._gauges())
+
+
+
+    def _gauges(self):
+        """
+        Reads the current state worth graphing, for the metrics server.
+
+        Returns:
+            list: (name, help, label names, label values -> value) tuples.
+        """
+        routing = self._routing
+        fingers = routing.finger_table
+        successor = fingers[0] if fingers else None
+        filled = sum(1 for f in fingers if f is not None)
+        srtt = self._net.rtt(successor) if successor else None
+        load = self._net.stats()
+        return [
+            ('chord_finger_table_entries', 'Distinct nodes in the finger table.',
+             (), {(): len(set(fingers) - {None})}),
+            ('chord_finger_table_fill_ratio', 'Fraction of finger slots filled.',
+             (), {(): filled / len(fingers) if fingers else 0.0}),
+            ('chord_successor_list_length', 'Entries in the successor list.',
+             (), {(): len(routing.successor_list)}),
+            ('chord_predecessor_known', '1 if the node has a predecessor.',
+             (), {(): int(routing.predecessor is not None)}),
+            ('chord_successor_known',
+             '1 if the successor is another node, 0 if it is unknown or itself.',
+             (), {(): int(successor is not None and successor != self.address)}),
+            ('chord_successor_rtt_seconds',
+             'Smoothed round-trip time to the successor.',
+             (), {(): srtt} if srtt is not None else {}),
+            ('chord_threads', 'Live threads in the process.',
+             (), {(): threading.active_count()}),
+            ('chord_workers_active', 'Request workers busy.',
+             (), {(): load['active']}),
+            ('chord_worker_queue_depth', 'Requests waiting for a worker.',
+             (), {(): load['queue_depth']}),
+            ('chord_worker_queue_capacity', 'Requests that can wait for a worker.',
+             (), {(): load['queue_capacity']}),
+            ('chord_connections_open', 'Open inbound connections.',
+             (), {(): load['connections']}),
+        ]
+
+
+
+    def _routing_state(self):
+        """Snapshot of the routing state, to detect topology changes."""
+        routing = self._routing
+        return (routing.predecessor, routing.successor_list,
+                routing.finger_table)
+
+
+
     def log_finger_table(self):
         """
         Logs the entire finger table to the log file.
         """
+        if not logger.isEnabledFor(logging.INFO):
+            return
         message = "Current Finger Table:\n"
         for i, finger in enumerate(self.finger_table):
             message += f"  Finger[{i}] -> {finger}\n"
 
-        print(message, file=sys.stderr)
+        logger.info("%s", message)
 
     def find_successor(self, id):
         """
@@ -177,33 +602,190 @@ class Node:
             id (int): Identifier to find the successor for.
 
         Returns:
-            Address: The address of the node responsible for the given identifier.
+            Address: The address of the node responsible for the given
+                identifier, or None if the lookup failed.
         """
+        mode = self._lookup_mode
         # If id is between this node and its successor
         if self._is_key_in_range(id):
+            self._lookups_done.inc(mode, 'local')
             return self.successor()
+
+        if self._cache:
+            cached = self._cache.get(id)
+            if cached:
+                self._lookups_done.inc(mode, 'cache')
+                return cached
+
+        started = time.monotonic()
+        if mode != 'recursive':
+            if mode == 'parallel':
+                owner, _, _ = self.lookup(id)
+            else:
+                owner, _ = self._iterative_lookup(id)
+            if owner and self._cache:
+                self._cache.put(id, owner)
+            self._lookups_done.inc(mode, 'remote' if owner else 'failed')
+            self._lookup_time.observe(time.monotonic() - started, mode)
+            return owner
         
-        # Find closest preceding node in my routing table.
-        closest_node = self.closest_preceding_finger(id)
-        
-        # If closest preceding node is me, then I need to return my own successor
-        if closest_node == self.address:
-            return self.successor()
+        failed = set()
+        while True:
+            # Find closest preceding node in my routing table.
+            closest = self.closest_preceding_fingers(id, 1, failed)
+            
+            # If there is none, then I need to return my own successor,
+            # unless every closer node failed: then it's only a guess
+            if not closest:
+                if failed and not self._is_key_in_range(id):
+                    self._lookups_done.inc(mode, 'failed')
+                    return None
+                self._lookups_done.inc(mode, 'local')
+                return self.successor()
+            closest_node = closest[0]
+
+            # If it's not me, forward my request to the closer node and
+            # then return what they send back. If the same lookup is already
+            # on its way to that node, wait for its answer instead.
+            try:
+                try:
+                    response = self._lookups.do(
+                        (closest_node.ip, closest_node.port, id),
+                        self._forward_lookup,
+                        closest_node,
+                        id
+                    )
+                except (OSError, RequestTimeout):
+                    # Try the next closest node (or fail over to the next
+                    # successor)
+                    failed.add(closest_node.key)
+                    continue
+                if response is BUSY:
+                    # Overloaded but alive: route around it this time
+                    failed.add(closest_node.key)
+                    continue
+                if not isinstance(response, Address):
+                    raise ValueError(f"Invalid FIND_SUCCESSOR response: {response}")
+                if self._cache:
+                    self._cache.put(id, response)
+                self._lookups_done.inc(mode, 'remote')
+                self._lookup_time.observe(time.monotonic() - started, mode)
+                return response
+            
+            except Exception as e:
+                logger.warning("Find successor failed: %s", e)
+                self._lookups_done.inc(mode, 'failed')
+                return None
 
-        # If it's not me, forward my request to the closer node and
-        # then return what they send back
+
+    def _forward_lookup(self, node, id):
+        """
+        Forwards a recursive lookup to the next hop.
+
+        Runs once for every caller sharing the lookup, so a dead hop is
+        forgotten once. A hop that can't be reached is forgotten; one that
+        is reached but doesn't answer in time is kept, since the delay may
+        be anywhere further along the lookup.
+
+        Args:
+            node (Address): The next hop.
+            id (int): Identifier being looked up.
+
+        Returns:
+            The hop's response.
+
+        Raises:
+            OSError: If the hop couldn't be reached.
+            RequestTimeout: If the lookup wasn't answered in time.
+        """
         try:
-            response = self._net.send_request(
-                closest_node, 
-                'FIND_SUCCESSOR', 
-                id
-            )
-            return self._parse_address(response)
-        
-        except Exception as e:
-            print(f"Find successor failed: {e}")
-            # Fallback to local successor if network request fails
-            return self.successor()
+            return self._net.request(node, 'FIND_SUCCESSOR', id)
+        except OSError as e:
+            logger.info("Lookup hop %s is unreachable: %s", node, e)
+            self._forget_node(node)
+            raise
+        except RequestTimeout as e:
+            logger.info("Lookup via %s timed out: %s", node, e)
+            raise
+
+
+
+    def find_successors(self, ids):
+        """
+        Finds the successor nodes for many identifiers at once.
+
+        Ids this node can answer itself (its own range, or the lookup
+        cache) are resolved without any RPC. The rest are grouped by the
+        finger they'd be forwarded to, and each group is sent to that
+        finger as a single FIND_SUCCESSORS request, which it resolves the
+        same way. Groups are sent in parallel. Batches are always forwarded
+        recursively, whatever the node's lookup mode.
+
+        Args:
+            ids (iterable): Identifiers to find the successors for.
+
+        Returns:
+            dict: id -> Address of the node responsible for it, or None
+                if its lookup failed.
+        """
+        results = {}
+        groups = {} # (ip, port) -> (Address, [ids])
+        for id in ids:
+            if id in results:
+                continue
+            if self._is_key_in_range(id):
+                results[id] = self.successor()
+                continue
+            cached = self._cache.get(id) if self._cache else None
+            if cached:
+                results[id] = cached
+                continue
+            closest = self.closest_preceding_fingers(id)
+            if not closest:
+                results[id] = self.successor()
+                continue
+            hop = closest[0]
+            groups.setdefault((hop.ip, hop.port), (hop, []))[1].append(id)
+
+        requests = [
+            (hop, group, self._net.submit_request(hop, 'FIND_SUCCESSORS', group))
+            for hop, group in groups.values()
+        ]
+        for hop, group, future in requests:
+            try:
+                response = future.result(
+                    timeout=self._net.request_timeout(hop, 'FIND_SUCCESSORS')
+                )
+            except Exception as e:
+                # Only a failure of the request itself says the hop is
+                # down. Running out of time doesn't: the batch is recursive,
+                # so the delay may be at any later hop.
+                unreachable = (isinstance(e, OSError) and future.done()
+                               and future.exception() is e)
+                future.cancel()
+                if unreachable:
+                    logger.warning("Find successors hop %s is unreachable: %s", hop, e)
+                    # Route the whole group around the failed hop
+                    self._forget_node(hop)
+                    results.update(self.find_successors(group))
+                    continue
+                logger.info("Find successors via %s failed: %s", hop, e)
+                response = None
+
+            if not isinstance(response, list) or len(response) != len(group):
+                # The hop is alive but overloaded or slow: single lookups
+                # route around it this time without dropping it from the
+                # routing state
+                results.update((id, self.find_successor(id)) for id in group)
+                continue
+            for id, owner in zip(group, response):
+                if not isinstance(owner, Address):
+                    owner = self.find_successor(id)
+                elif self._cache:
+                    self._cache.put(id, owner)
+                results[id] = owner
+        return results
+
 
 
     def closest_preceding_finger(self, id):
@@ -216,13 +798,241 @@ class Node:
         Returns:
             Address: The address of closest preceding node in the finger table.
         """
-        # Search finger table in reverse order
-        for finger in reversed(self.finger_table):
-            if finger and self._is_between(self.address.key, id, finger.key):
-                return finger
+        closest = self.finger_table.preceding(self.address.key, id)
+        if closest:
+            return closest[0]
         
         # This is only possible if there are no finger_table entries
         return self.address
+
+
+
+    def closest_preceding_fingers(self, id, count=1, exclude=()):
+        """
+        Lists the fingers that precede a given id, closest first.
+
+        Args:
+            id (int): Identifier to find preceding nodes for (the key).
+            count (int): Maximum number of fingers to return.
+            exclude (collection): Keys of nodes to leave out (e.g. failed).
+
+        Returns:
+            list: Up to `count` distinct finger Addresses. Empty if no
+                finger precedes the id.
+        """
+        return self.finger_table.preceding(self.address.key, id, count, exclude)
+
+
+
+    def lookup(self, id, alpha=None):
+        """
+        Finds an identifier's owner with parallel iterative routing.
+
+        At each step the `alpha` best known candidates (closest preceding
+        the id) are all asked for their next hops at once. The lookup
+        advances on the first good answer; the slower candidates are
+        left behind, and kept as fallbacks in case every later candidate
+        fails. One slow or dead node therefore doesn't stall the lookup.
+
+        Args:
+            id (int): Identifier to find the successor for.
+            alpha (int): Candidates queried per step. Defaults to the
+                node's `lookup_alpha`.
+
+        Returns:
+            tuple: (Address, int, list) the owner (None if the lookup
+                failed), the number of hops, and the latency in seconds
+                of each hop.
+        """
+        alpha = alpha or self._lookup_alpha
+        latencies = []
+        excluded = set() # keys of nodes that failed to answer
+        used = set() # keys of nodes whose answer the lookup advanced on
+        known = {} # key -> Address, candidates still worth asking
+
+        owner, candidates = self._next_hops(id, alpha)
+        while owner is None and len(latencies) < self._max_hops:
+            for candidate in candidates:
+                if candidate.key not in used and candidate.key not in excluded:
+                    known[candidate.key] = candidate
+            if not known:
+                break
+
+            # Closest to the id first
+            best = sorted(known.values(),
+                          key=lambda a: self._ring.distance(a.key, id))[:alpha]
+
+            sent = time.monotonic()
+            responder, response = self._first_next_hops(best, id, alpha, excluded)
+            for candidate in best:
+                if candidate.key in excluded:
+                    del known[candidate.key]
+            if responder is None:
+                candidates = []
+                continue # all failed; fall back on what we already know
+
+            # Candidates that lost the race stay known as fallbacks
+            latencies.append(time.monotonic() - sent)
+            used.add(responder.key)
+            del known[responder.key]
+            owner, candidates = response
+
+        if owner is None:
+            logger.warning("Parallel lookup for %d failed after %d hops",
+                           id, len(latencies))
+        else:
+            self._lookup_hops.observe(len(latencies), 'parallel')
+        return owner, len(latencies), latencies
+
+
+
+    def _first_next_hops(self, candidates, id, count, excluded):
+        """
+        Asks several candidates for their next hops at once.
+
+        Args:
+            candidates (list): Addresses to query.
+            id (int): Identifier being looked up.
+            count (int): Next-hop candidates to ask each node for.
+            excluded (set): Keys of failed nodes. Candidates that fail
+                here are added to it.
+
+        Returns:
+            tuple: (Address, list) the first candidate to give a
+                well-formed answer and its [owner, candidates] answer, or
+                (None, None) if none answered in time.
+        """
+        exclude = sorted(excluded)
+        pending = {
+            self._net.submit_request(
+                candidate, 'CLOSEST_PRECEDING_FINGER', id, count, exclude
+            ): candidate
+            for candidate in candidates
+        }
+        deadline = time.monotonic() + max(
+            self._net.request_timeout(c, 'CLOSEST_PRECEDING_FINGER')
+            for c in candidates
+        )
+
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=deadline - time.monotonic(),
+                               return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    candidate = pending.pop(future)
+                    try:
+                        response = future.result()
+                    except Exception:
+                        response = None
+                    if _is_next_hops(response):
+                        return candidate, response
+                    excluded.add(candidate.key)
+                    if response is not BUSY:
+                        self._forget_node(candidate)
+
+            # Whoever didn't answer in time is treated as failed
+            for candidate in pending.values():
+                excluded.add(candidate.key)
+            return None, None
+        finally:
+            # Stop waiting on the losers and stragglers
+            for future in pending:
+                future.cancel()
+
+
+
+    def _next_hops(self, id, count=1, exclude=()):
+        """
+        Answers one step of an iterative lookup.
+
+        Args:
+            id (int): Identifier being looked up.
+            count (int): Maximum number of candidates to return.
+            exclude (collection): Keys of nodes the caller wants avoided.
+
+        Returns:
+            list: [owner, candidates]. If this node knows the id's owner
+                (its successor), owner is set and candidates is empty.
+                Otherwise owner is None and candidates lists the closest
+                preceding fingers, closest first.
+        """
+        if self._is_key_in_range(id):
+            return [self.successor(), []]
+        candidates = self.closest_preceding_fingers(id, count, exclude)
+        if not candidates:
+            return [self.successor(), []]
+        return [None, candidates]
+
+
+
+    def _iterative_lookup(self, id):
+        """
+        Finds an identifier's owner by walking the ring from this node.
+
+        Each hop is asked for its closest preceding finger. Timeouts per
+        hop come from `_Net`'s RTT estimates. A hop that doesn't answer is
+        retried `lookup_retries` times, then excluded, and the previous
+        hop is asked for an alternative.
+
+        Args:
+            id (int): Identifier to find the successor for.
+
+        Returns:
+            tuple: (Address, list) the owner (None if the lookup failed)
+                and the latency in seconds of each hop that answered.
+        """
+        latencies = []
+        excluded = set()
+        path = [self.address] # nodes that answered, to back up to
+        owner, candidates = self._next_hops(id)
+
+        while owner is None and len(latencies) < self._max_hops:
+            current = candidates[0]
+            response = None
+            for _ in range(1 + self._lookup_retries):
+                sent = time.monotonic()
+                response = self._net.send_request(
+                    current, 'CLOSEST_PRECEDING_FINGER', id, 1, sorted(excluded)
+                )
+                if response is not None:
+                    break
+
+            if _is_next_hops(response):
+                latencies.append(time.monotonic() - sent)
+                path.append(current)
+                owner, candidates = response
+                continue
+
+            # Route around the failed (or overloaded) hop: ask the last
+            # node that answered for its next best candidate.
+            logger.info("Lookup hop %s failed, rerouting", current)
+            excluded.add(current.key)
+            if response is not BUSY:
+                self._forget_node(current)
+            while path:
+                previous = path[-1]
+                if previous == self.address:
+                    owner, candidates = self._next_hops(id, 1, excluded)
+                    break
+                response = self._net.send_request(
+                    previous, 'CLOSEST_PRECEDING_FINGER', id, 1, sorted(excluded)
+                )
+                if _is_next_hops(response):
+                    owner, candidates = response
+                    break
+                excluded.add(previous.key)
+                path.pop()
+            if owner is None and not candidates:
+                break
+
+        if owner is None:
+            logger.warning("Iterative lookup for %d failed after %d hops",
+                           id, len(latencies))
+        else:
+            self._lookup_hops.observe(len(latencies), 'iterative')
+        return owner, latencies
     
 
 
@@ -232,23 +1042,19 @@ class Node:
 
         Sets predecessor to None if unresponsive.
         """
-        if not self.predecessor:
+        predecessor = self.predecessor
+        if not predecessor:
             return
 
         try:
             # Try to send a simple request to the predecessor
-            response = self._net.send_request(
-                self.predecessor, 
-                'PING'
-            )
-            
             # If no response or invalid response, consider node failed
-            if not response or response != 'ALIVE':
-                self.predecessor = None
+            if not self._net.ping(predecessor):
+                self._forget_node(predecessor)
         
         except Exception as e:
             # Any network error means the predecessor is likely down
-            self.predecessor = None
+            self._forget_node(predecessor)
 
 
 
@@ -266,24 +1072,110 @@ class Node:
         if not self.successor():
             return
 
+        forgets = self._forgets
         try:
+            # Ask the successor for its successor list. If it doesn't
+            # answer, fail over to the next live entry straight away.
+            failed = set()
+            while True:
+                successor = self.successor()
+                successors = self._net.send_request(successor, 'GET_SUCCESSOR_LIST')
+                if isinstance(successors, list):
+                    break
+                if successors is BUSY:
+                    logger.info("Successor %s is busy, stabilizing later", successor)
+                    return
+                if successors is not None:
+                    raise ValueError(f"Invalid GET_SUCCESSOR_LIST response: {successors}")
+                if successor == self.address or successor.key in failed:
+                    # Nothing left to fail over to
+                    logger.warning("No reachable successor, stabilizing later")
+                    return
+                logger.warning("Successor %s is unreachable, failing over", successor)
+                failed.add(successor.key)
+                self._forget_node(successor)
+
             # Get the predecessor of the current successor
             #print(f"stabilize: checking successor {self.successor().key} for predecessor", file=sys.stderr)
-            x_response = self._net.send_request(self.successor(), 'GET_PREDECESSOR')
+            x = self._net.send_request(successor, 'GET_PREDECESSOR')
 
-            #print(f"stabilize: predecessor found: {x_response}", file=sys.stderr)
-            x = self._parse_address(x_response)
+            #print(f"stabilize: predecessor found: {x}", file=sys.stderr)
+            if x is not None and not isinstance(x, Address):
+                raise ValueError(f"Invalid GET_PREDECESSOR response: {x}")
+            if x:
+                self._observe_node(x)
 
-            if x and self._is_between(self.address.key, self.successor().key, x.key):
-                self.finger_table[0] = x
-                #print(f"stabilize: updated successor to {self.successor().key}", file=sys.stderr)
-            # otherwise, we just notify them that we exist. This is usually for the first joiner to a ring.
+            # Take x as successor if it sits between us; either way, notify
+            # the successor that we exist (usually for the first joiner)
+            self._adopt_successors(successor, successors, x, failed, forgets)
 
             self.notify(self.successor())
             #print(f"Node {self.address} - Updated Successor: {self.successor()}, Predecessor: {self.predecessor}", file=sys.stderr)
 
         except Exception as e:
-            print(f"Stabilize failed: {e}", file=sys.stderr) 
+            logger.warning("Stabilize failed: %s", e)
+
+
+
+    def _adopt_successors(self, successor, successors, x, failed, forgets):
+        """
+        Applies what stabilize learned from the successor.
+
+        The successor list and finger 0 are rebuilt in one step from the
+        routing state current at that moment. Nodes that failed this round,
+        or were forgotten by another thread while stabilize's requests were
+        in flight, are left out so they don't come back.
+
+        Args:
+            successor (Address): The successor that answered.
+            successors (list): Its successor list.
+            x (Address): Its predecessor, or None.
+            failed (set): Keys of nodes that didn't answer this round.
+            forgets (int): `_forgets` when stabilize started.
+        """
+        candidates = [successor] + list(successors)
+        if x and self._is_between(self.address.key, successor.key, x.key):
+            candidates.insert(0, x)
+
+        with self._routing_lock:
+            # The successor may still list nodes that just failed us, and
+            # may still have one as its predecessor until its own
+            # check_predecessor runs
+            dropped = set(failed)
+            dropped.update(a.key for n, a in self._forgotten if n > forgets)
+            result = self._build_successor_list(candidates, dropped)
+            if not result:
+                if dropped:
+                    # Everything we learned is gone already; keep the
+                    # fallback _forget_node chose
+                    return
+                result = [self.address] # a ring of one
+            self._routing = self._with_successors(self._routing, result)
+
+
+
+    def _build_successor_list(self, candidates, dropped=()):
+        """
+        Builds a successor list from candidates, successor first.
+
+        Duplicates, this node itself and nodes whose keys are in `dropped`
+        are left out.
+
+        Args:
+            candidates (list): Candidate successors, in ring order.
+            dropped (set): Keys of nodes to leave out.
+
+        Returns:
+            list: Up to `successor_list_size` addresses.
+        """
+        result = []
+        for address in candidates:
+            if (isinstance(address, Address) and address != self.address
+                    and address.key not in dropped and address not in result):
+                result.append(address)
+                if len(result) == self._successor_list_size:
+                    break
+        return result
 
 
     def notify(self, potential_successor):
@@ -305,14 +1197,14 @@ class Node:
             response = self._net.send_request(
                 potential_successor, 
                 'NOTIFY', 
-                f"{self.address.key}:{self.address.ip}:{self.address.port}"
+                self.address
             )
             if response == "OK" or response == "IGNORED":
                 return True
             else:
                 return False
         except Exception as e:
-            print(f"Notify failed: {e}", file=sys.stderr)
+            logger.warning("Notify failed: %s", e)
 
 
     def start(self):
@@ -329,8 +1221,11 @@ class Node:
         """
         Gracefully stops the Chord node's network listener.
 
-        Closes the server socket and waits for the network thread to terminate.
+        Stops background maintenance and the metrics server, closes the
+        server socket and waits for the network thread to terminate.
         """
+        self.stop_maintenance()
+        self.stop_metrics_server()
         self._net.stop()
 
 
@@ -348,13 +1243,7 @@ class Node:
         if not self.successor(): # no successor case
             return True
         
-        successor_key = self.successor().key
-        
-        if self.address.key < successor_key:
-            # Normal case: key is strictly between node and successor
-            return self.address.key < key < successor_key
-        else:  # Wrap around case
-            return key > self.address.key or key < successor_key
+        return self._ring.between(self.address.key, self.successor().key, key)
     
 
 
@@ -370,10 +1259,7 @@ class Node:
         Returns:
             bool: True if the node is between start and end, False otherwise.
         """
-        if start < end:
-            return start < key < end
-        else:  # Wrap around case
-            return key > start or key < end
+        return self._ring.between(start, end, key)
     
 
 
@@ -387,12 +1273,86 @@ class Node:
         Returns:
             bool: True if the node was accepted as a predecessor, False otherwise.
         """
+        self._observe_node(notifying_node)
+
         # Update predecessor if necessary
-        if (not self.predecessor or 
-            self._is_between(self.predecessor.key, self.address.key, notifying_node.key)):
-            self.predecessor = notifying_node
-            return True
-        return False
+        with self._routing_lock:
+            predecessor = self._routing.predecessor
+            accepted = (not predecessor or 
+                self._is_between(predecessor.key, self.address.key, notifying_node.key))
+            if accepted:
+                self._routing = self._routing.replace(predecessor=notifying_node)
+        maintenance = self._maintenance
+        if accepted and maintenance:
+            # A new neighbour: repair at full speed rather than waiting
+            # for the next (possibly backed-off) task run to notice
+            maintenance.reset()
+        return accepted
+
+    def cache_stats(self):
+        """
+        Reports lookup cache effectiveness.
+
+        Returns:
+            dict: size, capacity, hits, misses, evictions and invalidations,
+                or None if the cache is disabled.
+        """
+        return self._cache.stats() if self._cache else None
+
+
+
+    def _observe_node(self, address):
+        """
+        Takes note of a node seen in the ring (e.g. a new predecessor).
+
+        Cached lookup ranges that the node now takes over are cut back.
+        """
+        if self._cache:
+            self._cache.invalidate_key(address.key)
+        if self._last_lookup:
+            _, start, owner = self._last_lookup
+            if self._ring.distance(start, address.key) < self._ring.distance(start, owner.key):
+                self._last_lookup = None
+
+
+
+    def _forget_node(self, address):
+        """
+        Takes note of a node that failed.
+
+        The node is removed from the routing state and cached results
+        pointing to it are dropped. If it was the successor, the next entry
+        of the successor list takes over right away.
+        """
+        if not address or address == self.address:
+            return
+        if self._cache:
+            self._cache.invalidate_owner(address)
+        if self._last_lookup and self._last_lookup[2] == address:
+            self._last_lookup = None
+
+        with self._routing_lock:
+            self._forgets += 1
+            self._forgotten.append((self._forgets, address))
+            routing = self._routing
+            successors = [a for a in routing.successor_list if a != address]
+            fingers = routing.finger_table
+            for i, finger in enumerate(fingers):
+                if finger == address:
+                    fingers = fingers.replace(i, None)
+            predecessor = routing.predecessor
+            if predecessor == address:
+                predecessor = None
+
+            if fingers and fingers[0] is None:
+                # Next live successor, else the closest finger, else ourselves
+                fallback = next((f for f in fingers if f), self.address)
+                if not successors:
+                    successors = [fallback]
+                fingers = fingers.replace(0, successors[0])
+            self._routing = _RoutingState(predecessor, successors, fingers)
+
+
 
     def trace_successor(self, id, curr_hops):
         """
@@ -425,25 +1385,16 @@ class Node:
                 id,
                 curr_hops
             )
-            print(f"Raw response: {response}", file=sys.stderr)  # Debugging line
-            parts = response.split(":")
-            if len(parts) != 4:
+            logger.debug("TRACE_SUCCESSOR response from %s: %s", closest_node, response)
+            if not isinstance(response, list) or len(response) != 2:
                 raise ValueError(f"Invalid response format: {response}")
-            node_key, node_ip, node_port, hops = parts
-            # resolved_node = Address(node_ip, int(node_port))
-            # resolved_node.key = int(node_key)
-            response_split = response.split(":")
-            address = ':'.join(response_split[:-1])
-            print ("[trace]Joined Address :", address)
-            # address = '':'.join(response[:2])
-            return address, int(hops)+1
-
-            # return self._parse_address(response), hops
+            address, hops = response
+            return address, hops + 1
         
         except Exception as e:
-            print(f"trace successor failed: {e}")
+            logger.warning("trace successor failed: %s", e)
             # Fallback to local successor if network request fails
-            return self.successor()
+            return self.successor(), curr_hops
 
 
     def _process_request(self, method, args):
@@ -452,7 +1403,7 @@ class Node:
 
         Args:
             method (str): The method to be called.
-            args (list): Arguments for the method.
+            args (list): Decoded arguments for the method.
 
         Returns:
             The result of the method call or an error message.
@@ -460,60 +1411,41 @@ class Node:
         if method == "PING":
             return "ALIVE"
         elif method == 'FIND_SUCCESSOR':
-            return self.find_successor(int(args[0]))
+            # None would look like a network failure to the caller
+            return self.find_successor(args[0]) or "NOT_FOUND"
+        elif method == 'FIND_SUCCESSORS':
+            ids = args[0]
+            results = self.find_successors(ids)
+            return [results[id] for id in ids]
         elif method == "TRACE_SUCCESSOR":
             try:
-                id, hops = int(args[0]), int(args[1])
-                print ("[NODE] Current ID ", id, "Current hops ", hops)
+                id, hops = args[0], args[1]
+                logger.debug("TRACE_SUCCESSOR for %d, %d hops so far", id, hops)
                 successor, hops = self.trace_successor(id, hops)
-                
-                print ("SUCCESSSOR NODE :", successor, "HOPS :", hops)
-                returnString = f"{successor}:{hops}"
-                return returnString
+                logger.debug("TRACE_SUCCESSOR for %d: %s after %d hops", id, successor, hops)
+                return [successor, hops]
             except Exception as e:
-                print(f"TRACE_SUCCESSOR error: {e}", file=sys.stderr)
+                logger.warning("TRACE_SUCCESSOR error: %s", e)
                 return "ERROR:Invalid TRACE_SUCCESSOR Request"
 
+        elif method == 'CLOSEST_PRECEDING_FINGER':
+            id, count, exclude = args[0], args[1], args[2]
+            return self._next_hops(id, count, exclude)
         elif method == 'GET_PREDECESSOR':
-            return self.predecessor if self.predecessor else "nil"
+            return self.predecessor
+        elif method == 'GET_FINGERS':
+            return list(self.finger_table)
+        elif method == 'GET_SUCCESSOR_LIST':
+            return list(self.successor_list) or [a for a in [self.successor()] if a]
         elif method == 'NOTIFY':
-            # Parse the notifying node's details
-            try:
-                notifier = self._parse_address(':'.join([args[0], args[1], args[2]]))
-                return "OK" if self._be_notified(notifier) else "IGNORED"
-
-            except ValueError:
+            notifier = args[0] if args else None
+            if not isinstance(notifier, Address):
                 return "INVALID_NODE"
+            return "OK" if self._be_notified(notifier) else "IGNORED"
         else: 
             return "INVALID_METHOD"
 
 
-    def _parse_address(self, response):
-        """
-        Parses a network response into an Address object. Only addresses are expected.
-
-        Args:
-            response (str): Serialized node address in "key:ip:port" format.
-
-        Returns:
-            Address: Parsed Address object.
-
-        Raises:
-            ValueError: If the response format is invalid.
-        """
-        if response == "nil":
-            return None
-        parts = response.split(':')
-        if len(parts) == 3:
-            address = Address(parts[1], int(parts[2]))
-            address.key = int(parts[0])
-
-            return address
-        else:
-            raise ValueError("Invalid node address response format")
-
-
-
     def __repr__(self):
         """
         Provides a string representation of the Chord node.
@@ -525,3 +1457,10 @@ class Node:
         return f"ChordNode(key={self.address.key})"
 
 
+
+def _is_next_hops(response):
+    """Checks that a CLOSEST_PRECEDING_FINGER response is well formed."""
+    return (isinstance(response, list) and len(response) == 2
+            and (response[0] is None or isinstance(response[0], Address))
+            and isinstance(response[1], list)
+            and (response[0] is not None or response[1]))
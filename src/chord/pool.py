@@ -0,0 +1,289 @@
+# pool.py
+
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import Future
+
+from . import protocol
+
+logger = logging.getLogger(__name__)
+
+class _PooledConnection:
+    """
+    A long-lived, multiplexed client connection to a single peer.
+
+    Any number of requests can be outstanding on the connection at once.
+    Each one is tagged with a request id; a reader thread matches responses
+    to the waiting futures by id, so responses may arrive in any order.
+
+    Attributes:
+        sock (socket): The connected socket.
+        pending (dict): request id -> Future for requests awaiting a response.
+        last_used (float): Monotonic time of the last request sent.
+        closed (bool): Set once the connection has failed or been closed.
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.pending = {}
+        self.last_used = time.monotonic()
+        self.closed = False
+        self._lock = threading.Lock() # guards pending and closed
+        self._send_lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_responses, daemon=True)
+        self._reader.start()
+
+
+
+    def send(self, request_id, frame):
+        """
+        Sends a request frame and registers a future for its response.
+
+        Args:
+            request_id (int): Id the response will carry.
+            frame (bytes): The encoded request.
+
+        Returns:
+            Future: Resolved with the decoded response value. Cancelling
+                it stops waiting for the response.
+
+        Raises:
+            OSError: If the connection is closed or the send fails.
+        """
+        future = Future()
+        with self._lock:
+            if self.closed:
+                raise ConnectionResetError("connection closed")
+            self.pending[request_id] = future
+        # A caller that gives up cancels the future; drop it from pending
+        # so a peer that never answers can't pin the connection open
+        future.add_done_callback(
+            lambda done: done.cancelled() and self.forget(request_id)
+        )
+        self.last_used = time.monotonic()
+        try:
+            with self._send_lock:
+                self.sock.sendall(frame)
+        except OSError:
+            self.forget(request_id)
+            self.close()
+            raise
+        return future
+
+
+
+    def forget(self, request_id):
+        """Stops waiting for a request's response (e.g. it timed out)."""
+        with self._lock:
+            self.pending.pop(request_id, None)
+
+
+
+    def in_flight(self):
+        return len(self.pending)
+
+
+
+    def is_healthy(self):
+        """
+        Checks that the connection can still be used.
+
+        The reader thread notices a peer closing or resetting the connection
+        as soon as it happens, and marks the connection closed.
+
+        Returns:
+            bool: True if the connection looks usable, False otherwise.
+        """
+        return not self.closed
+
+
+
+    def close(self, error=None):
+        """
+        Closes the connection and fails any requests still waiting on it.
+
+        Args:
+            error (Exception): Error to give the waiting requests.
+        """
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            pending, self.pending = self.pending, {}
+        # shutdown wakes up the reader thread blocked in recv()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+        error = error or ConnectionResetError("connection closed")
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+
+
+    def _read_responses(self):
+        error = None
+        try:
+            while True:
+                frame = protocol.read_frame(self.sock)
+                if frame is None:
+                    break
+                _, request_id, payload = frame
+                with self._lock:
+                    future = self.pending.pop(request_id, None)
+                if future is None or not future.set_running_or_notify_cancel():
+                    continue # the caller gave up waiting
+                try:
+                    future.set_result(protocol.decode_value(payload))
+                except ValueError as e:
+                    future.set_exception(e)
+        except (OSError, ValueError) as e:
+            error = e
+        except Exception as e:
+            logger.warning("Error reading responses: %s", e)
+            error = e
+        finally:
+            self.close(error)
+
+
+
+class _ConnectionPool:
+    """
+    Keeps a bounded set of multiplexed connections per destination address.
+
+    Requests to a peer share its connections. A new connection is only
+    opened when every existing one already has `max_in_flight` requests
+    outstanding, and at most `max_per_peer` are opened per peer. Connections
+    with nothing in flight for more than `idle_timeout` seconds are evicted.
+    """
+
+    def __init__(self, max_per_peer=4, idle_timeout=30.0, max_in_flight=64):
+        self._max_per_peer = max_per_peer
+        self._idle_timeout = idle_timeout
+        self._max_in_flight = max_in_flight
+        self._conns = {} # (ip, port) -> [ _PooledConnection, ... ]
+        self._lock = threading.Lock()
+        self._connecting = {} # (ip, port) -> Lock
+        self._last_sweep = time.monotonic()
+
+
+
+    def acquire(self, dest_node, timeout):
+        """
+        Gets a connection to a destination, reusing an open one if possible.
+
+        Args:
+            dest_node (Address): The peer to connect to.
+            timeout (float): Timeout for establishing a new connection.
+
+        Returns:
+            tuple: (_PooledConnection, bool) where the flag is True if the
+                connection was already open.
+
+        Raises:
+            OSError: If a new connection can't be established.
+        """
+        self._maybe_sweep()
+        peer = (dest_node.ip, dest_node.port)
+
+        conn = self._pick(peer)
+        if conn:
+            return conn, True
+
+        # Only one thread connects to a given peer at a time; the others
+        # wait and then share the new connection.
+        with self._lock:
+            connecting = self._connecting.setdefault(peer, threading.Lock())
+        with connecting:
+            conn = self._pick(peer)
+            if conn:
+                return conn, True
+
+            sock = socket.create_connection(peer, timeout=timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Per-request timeouts are enforced by whoever waits on the
+            # response; the reader thread blocks until data arrives.
+            sock.settimeout(None)
+            conn = _PooledConnection(sock)
+            with self._lock:
+                self._conns.setdefault(peer, []).append(conn)
+            return conn, False
+
+
+
+    def discard(self, conn):
+        """Closes a connection that failed and must not be reused."""
+        try:
+            conn.close()
+        except OSError:
+            pass
+
+
+
+    def close_all(self):
+        """Closes every connection held by the pool."""
+        with self._lock:
+            conns, self._conns = self._conns, {}
+        for peer_conns in conns.values():
+            for conn in peer_conns:
+                self.discard(conn)
+
+
+
+    def _pick(self, peer):
+        """
+        Chooses the least loaded healthy connection to a peer.
+
+        Returns None if a new connection should be opened instead.
+        """
+        with self._lock:
+            conns = self._conns.get(peer)
+            if not conns:
+                return None
+            conns[:] = [c for c in conns if c.is_healthy()]
+            if not conns:
+                del self._conns[peer]
+                return None
+            best = min(conns, key=_PooledConnection.in_flight)
+            if (best.in_flight() >= self._max_in_flight
+                    and len(conns) < self._max_per_peer):
+                return None
+            return best
+
+
+
+    def _is_idle(self, conn, now):
+        return (not conn.pending and
+                now - conn.last_used > self._idle_timeout)
+
+
+
+    def _maybe_sweep(self):
+        """
+        Evicts idle or broken connections, at most once per idle period.
+        """
+        now = time.monotonic()
+        if now - self._last_sweep < self._idle_timeout:
+            return
+        self._last_sweep = now
+
+        expired = []
+        with self._lock:
+            for peer, conns in list(self._conns.items()):
+                keep = []
+                for conn in conns:
+                    if conn.is_healthy() and not self._is_idle(conn, now):
+                        keep.append(conn)
+                    else:
+                        expired.append(conn)
+                if keep:
+                    self._conns[peer] = keep
+                else:
+                    del self._conns[peer]
+        for conn in expired:
+            self.discard(conn)
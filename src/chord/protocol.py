@@ -0,0 +1,318 @@
+# protocol.py
+"""
+Binary wire format for chord messages.
+
+Every message is a frame: a fixed 9-byte header followed by a payload.
+
+    header: opcode (u8) | request id (u32) | payload length (u32)
+
+Responses reuse the opcode of the request with the high bit set. A request
+payload is a sequence of values (the arguments); a response payload is a
+single value. Each value starts with a one-byte tag:
+
+    NIL       nothing
+    INT       unsigned integer, ID_BYTES wide (ids, hop counts)
+    ADDR      packed IPv4 (4) | port (u16) | key (ID_BYTES)
+    HOST      host length (u8) | host | port (u16) | key (ID_BYTES)
+    STR       length (u16) | utf-8
+    BYTES     length (u32) | raw bytes
+    LIST      count (u32) | values
+    BUSY      nothing; the server had no capacity to handle the request
+"""
+
+import struct
+
+from .address import KEY_BYTES, Address
+
+HEADER = struct.Struct('!BII')
+ID_BYTES = KEY_BYTES # wide enough for a full SHA-1 identifier
+MAX_PAYLOAD = 16 * 1024 * 1024
+MAX_DATAGRAM = 512 # UDP requests and replies are small probes
+RESPONSE = 0x80
+MAX_INT = (1 << (8 * ID_BYTES)) - 1 # largest INT value
+
+OPCODES = {
+    'PING': 1,
+    'FIND_SUCCESSOR': 2,
+    'TRACE_SUCCESSOR': 3,
+    'GET_PREDECESSOR': 4,
+    'NOTIFY': 5,
+    'CLOSEST_PRECEDING_FINGER': 6,
+    'GET_SUCCESSOR_LIST': 7,
+    'FIND_SUCCESSORS': 8,
+    'GET_FINGERS': 9,
+}
+METHODS = {opcode: method for method, opcode in OPCODES.items()}
+
+_NIL, _INT, _ADDR, _HOST, _STR, _BYTES, _LIST, _BUSY = range(8)
+
+class _Busy:
+    """
+    The answer to a request a node was too loaded to handle.
+
+    It has its own tag, so clients can tell an overloaded node (alive,
+    try again later or elsewhere) from a failed or confused one.
+    """
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'BUSY'
+
+BUSY = _Busy()
+
+_U8 = struct.Struct('!B')
+_U16 = struct.Struct('!H')
+_U32 = struct.Struct('!I')
+
+
+
+def encode_request(method, request_id, args):
+    """
+    Builds a request frame.
+
+    Args:
+        method (str): Method name, must be one of OPCODES.
+        request_id (int): Id echoed back in the response.
+        args (iterable): Values to send as arguments.
+
+    Returns:
+        bytes: The encoded frame.
+
+    Raises:
+        ValueError: If the method is unknown or an argument can't be encoded.
+    """
+    try:
+        opcode = OPCODES[method]
+    except KeyError:
+        raise ValueError(f"Unknown method: {method}") from None
+    parts = []
+    for arg in args:
+        _encode_value(arg, parts)
+    return _frame(opcode, request_id, b''.join(parts))
+
+
+
+def encode_response(opcode, request_id, value):
+    """
+    Builds a response frame for a request.
+
+    Args:
+        opcode (int): Opcode of the request being answered.
+        request_id (int): Id of the request being answered.
+        value: The value to send back.
+
+    Returns:
+        bytes: The encoded frame.
+
+    Raises:
+        ValueError: If the value can't be encoded.
+    """
+    parts = []
+    _encode_value(value, parts)
+    return _frame(opcode | RESPONSE, request_id, b''.join(parts))
+
+
+
+def decode_values(payload):
+    """
+    Decodes every value in a payload.
+
+    Args:
+        payload (bytes): Frame payload.
+
+    Returns:
+        list: The decoded values, in order.
+
+    Raises:
+        ValueError: If the payload is malformed.
+    """
+    view = memoryview(payload)
+    values = []
+    offset = 0
+    try:
+        while offset < len(view):
+            value, offset = _decode_value(view, offset)
+            values.append(value)
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed payload: {e}") from None
+    except RecursionError:
+        raise ValueError("Malformed payload: lists nested too deeply") from None
+    return values
+
+
+
+def decode_value(payload):
+    """
+    Decodes a payload holding exactly one value (a response).
+
+    Raises:
+        ValueError: If the payload doesn't hold exactly one value.
+    """
+    values = decode_values(payload)
+    if len(values) != 1:
+        raise ValueError(f"Expected one value, got {len(values)}")
+    return values[0]
+
+
+
+def read_frame(sock):
+    """
+    Reads one complete frame from a socket.
+
+    Args:
+        sock (socket): Connected socket to read from.
+
+    Returns:
+        tuple: (opcode, request_id, payload), or None if the peer closed
+            the connection before a new frame started.
+
+    Raises:
+        ValueError: If the header announces an oversized payload.
+        ConnectionResetError: If the peer closes in the middle of a frame.
+    """
+    header = recv_exact(sock, HEADER.size, allow_eof=True)
+    if header is None:
+        return None
+    opcode, request_id, length = HEADER.unpack(header)
+    if length > MAX_PAYLOAD:
+        raise ValueError(f"Frame too large: {length} bytes")
+    payload = recv_exact(sock, length) if length else b''
+    return opcode, request_id, payload
+
+
+
+def recv_exact(sock, size, allow_eof=False):
+    """
+    Receives exactly `size` bytes, looping over short reads.
+
+    Args:
+        sock (socket): Connected socket to read from.
+        size (int): Number of bytes to read.
+        allow_eof (bool): Return None instead of raising if the peer closed
+            before any byte was read.
+
+    Returns:
+        bytes: The data read.
+    """
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            if allow_eof and received == 0:
+                return None
+            raise ConnectionResetError("connection closed mid-frame")
+        received += n
+    return bytes(buf)
+
+
+
+def _frame(opcode, request_id, payload):
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(f"Frame too large: {len(payload)} bytes")
+    return HEADER.pack(opcode, request_id, len(payload)) + payload
+
+
+
+def _encode_value(value, parts):
+    if value is None:
+        parts.append(_U8.pack(_NIL))
+    elif value is BUSY:
+        parts.append(_U8.pack(_BUSY))
+    elif isinstance(value, bool):
+        raise ValueError("Booleans are not part of the wire format")
+    elif isinstance(value, int):
+        if not 0 <= value <= MAX_INT:
+            raise ValueError(f"Integer out of range for the wire format: {value}")
+        parts.append(_U8.pack(_INT))
+        parts.append(value.to_bytes(ID_BYTES, 'big'))
+    elif isinstance(value, Address):
+        parts.append(_encode_address(value))
+    elif isinstance(value, str):
+        data = value.encode()
+        if len(data) > 0xFFFF:
+            raise ValueError(f"String too long for the wire format: {len(data)} bytes")
+        parts.append(_U8.pack(_STR) + _U16.pack(len(data)))
+        parts.append(data)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        parts.append(_U8.pack(_BYTES) + _U32.pack(len(value)))
+        parts.append(bytes(value))
+    elif isinstance(value, (list, tuple)):
+        parts.append(_U8.pack(_LIST) + _U32.pack(len(value)))
+        for item in value:
+            _encode_value(item, parts)
+    else:
+        raise ValueError(f"Can't encode value of type {type(value).__name__}")
+
+
+
+def _encode_address(address):
+    if not 0 <= address.port <= 0xFFFF:
+        raise ValueError(f"Port out of range for the wire format: {address.port}")
+    try:
+        return _U8.pack(_ADDR) + address.to_bytes()
+    except ValueError:
+        pass # not IPv4, send the host name instead
+
+    host = address.ip.encode()
+    if len(host) > 0xFF:
+        raise ValueError(f"Host name too long for the wire format: {len(host)} bytes")
+    return (_U8.pack(_HOST) + _U8.pack(len(host)) + host
+            + _U16.pack(address.port) + address.key.to_bytes(ID_BYTES, 'big'))
+
+
+
+def _decode_value(view, offset):
+    tag = view[offset]
+    offset += 1
+    if tag == _NIL:
+        return None, offset
+    if tag == _BUSY:
+        return BUSY, offset
+    if tag == _INT:
+        return (int.from_bytes(_take(view, offset, ID_BYTES), 'big'),
+                offset + ID_BYTES)
+    if tag == _ADDR:
+        _take(view, offset, Address.PACKED_SIZE)
+        return Address.from_bytes(view, offset), offset + Address.PACKED_SIZE
+    if tag == _HOST:
+        length = view[offset]
+        offset += 1
+        host = str(_take(view, offset, length), 'utf-8')
+        offset += length
+        (port,) = _U16.unpack_from(view, offset)
+        offset += _U16.size
+        return _make_address(host, port, view, offset)
+    if tag == _STR:
+        (length,) = _U16.unpack_from(view, offset)
+        offset += _U16.size
+        return str(_take(view, offset, length), 'utf-8'), offset + length
+    if tag == _BYTES:
+        (length,) = _U32.unpack_from(view, offset)
+        offset += _U32.size
+        return bytes(_take(view, offset, length)), offset + length
+    if tag == _LIST:
+        (count,) = _U32.unpack_from(view, offset)
+        offset += _U32.size
+        items = []
+        for _ in range(count):
+            item, offset = _decode_value(view, offset)
+            items.append(item)
+        return items, offset
+    raise ValueError(f"Unknown value tag: {tag}")
+
+
+
+def _make_address(ip, port, view, offset):
+    key = int.from_bytes(_take(view, offset, ID_BYTES), 'big')
+    return Address.intern(ip, port, key), offset + ID_BYTES
+
+
+
+def _take(view, offset, length):
+    end = offset + length
+    if end > len(view):
+        raise IndexError("truncated value")
+    return view[offset:end]
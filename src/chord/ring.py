@@ -0,0 +1,119 @@
+# ring.py
+
+import hashlib
+
+MAX_M = 160 # width of a SHA-1 digest
+
+class _Ring:
+    """
+    Identifier arithmetic for a Chord ring of 2 ** m ids.
+
+    All interval and modular math on ids goes through here, so the id
+    width is a property of the ring rather than a constant. The ring size
+    is a power of two, so reductions are a bit mask rather than a
+    division, and finger offsets are computed once up front. Python ints
+    are arbitrary precision, so the same code serves 16-bit and full
+    160-bit rings.
+
+    Attributes:
+        m (int): Number of bits in an identifier.
+        space (int): Number of identifiers on the ring (2 ** m).
+        mask (int): space - 1, for reducing ids onto the ring.
+    """
+
+    __slots__ = ('m', 'space', 'mask', '_gaps')
+
+    def __init__(self, m):
+        """
+        Args:
+            m (int): Number of bits in an identifier, 1 to MAX_M.
+
+        Raises:
+            ValueError: If m is out of range.
+        """
+        if not 1 <= m <= MAX_M:
+            raise ValueError(f"Identifier width must be 1 to {MAX_M} bits, not {m}")
+        self.m = m
+        self.space = 1 << m
+        self.mask = self.space - 1
+        self._gaps = tuple(1 << i for i in range(m))
+
+
+
+    def hash(self, text):
+        """
+        Maps a string onto the ring.
+
+        Args:
+            text (str): Input string to hash.
+
+        Returns:
+            int: The low m bits of its SHA-1 digest.
+        """
+        return int.from_bytes(hashlib.sha1(text.encode()).digest(), 'big') & self.mask
+
+
+
+    def distance(self, start, end):
+        """Returns the clockwise distance from start to end."""
+        return (end - start) & self.mask
+
+
+
+    def between(self, start, end, key):
+        """
+        Checks if a key lies strictly between two ids, going clockwise.
+
+        When start == end the interval is the whole ring except start.
+
+        Args:
+            start (int): Starting identifier (excluded).
+            end (int): Ending identifier (excluded).
+            key (int): Identifier to check.
+
+        Returns:
+            bool: True if the key is in (start, end), False otherwise.
+        """
+        return between(start, end, key)
+
+
+
+    def gap(self, i):
+        """Returns the offset of finger i from its node, 2 ** i."""
+        return self._gaps[i]
+
+
+
+    def finger_start(self, key, i):
+        """Returns the first id of finger i's interval for node `key`."""
+        return (key + self._gaps[i]) & self.mask
+
+
+
+def between(start, end, key):
+    """Checks if key is in the open interval (start, end); see `_Ring.between`."""
+    if start < end:
+        return start < key < end
+    return key > start or key < end
+
+
+
+_RINGS = {}
+
+def get_ring(m):
+    """
+    Returns the shared `_Ring` for an id width.
+
+    Args:
+        m (int): Number of bits in an identifier.
+
+    Returns:
+        _Ring: The ring, created on first use.
+
+    Raises:
+        ValueError: If m is out of range.
+    """
+    ring = _RINGS.get(m)
+    if ring is None:
+        ring = _RINGS.setdefault(m, _Ring(m))
+    return ring
@@ -0,0 +1,47 @@
+# routing.py
+
+class _RoutingState:
+    """
+    An immutable snapshot of a node's routing state.
+
+    Request handlers read the node's current snapshot without locking and
+    can use it throughout, never seeing a half-applied update. Writers
+    build a modified copy with `replace` and swap it in with a single
+    assignment (see `Node._update_routing`).
+
+    Attributes:
+        predecessor (Address): The previous node in the ring, or None.
+        successor_list (tuple): The next few nodes in the ring.
+        finger_table (_FingerTable): Finger slots and their index.
+    """
+
+    __slots__ = ('predecessor', 'successor_list', 'finger_table')
+
+    def __init__(self, predecessor, successor_list, finger_table):
+        object.__setattr__(self, 'predecessor', predecessor)
+        object.__setattr__(self, 'successor_list', tuple(successor_list))
+        object.__setattr__(self, 'finger_table', finger_table)
+
+
+
+    def replace(self, **changes):
+        """
+        Returns a copy of the snapshot with some fields changed.
+
+        Args:
+            **changes: New values for predecessor, successor_list or
+                finger_table.
+
+        Returns:
+            _RoutingState: The new snapshot.
+        """
+        return _RoutingState(
+            changes.get('predecessor', self.predecessor),
+            changes.get('successor_list', self.successor_list),
+            changes.get('finger_table', self.finger_table),
+        )
+
+
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Routing state is immutable, can't set {name}")
@@ -0,0 +1,144 @@
+# rtt.py
+
+import threading
+
+class _RttEstimator:
+    """
+    Smoothed round-trip time estimate for one peer, as in TCP (RFC 6298).
+
+    Keeps a smoothed RTT and its mean deviation, and derives a
+    retransmission-style timeout from them. Timeouts back off
+    exponentially until a new sample arrives.
+
+    Attributes:
+        srtt (float): Smoothed round-trip time in seconds, None until sampled.
+        rttvar (float): Round-trip time variation in seconds.
+        rto (float): Current timeout in seconds.
+        samples (int): Number of samples taken.
+        timeouts (int): Number of requests that timed out.
+    """
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+    GRANULARITY = 0.001
+
+    __slots__ = ('srtt', 'rttvar', 'rto', 'samples', 'timeouts',
+                 '_min_rto', '_max_rto')
+
+    def __init__(self, initial_rto=1.0, min_rto=0.2, max_rto=5.0):
+        self.srtt = None
+        self.rttvar = None
+        self.rto = initial_rto
+        self.samples = 0
+        self.timeouts = 0
+        self._min_rto = min_rto
+        self._max_rto = max_rto
+
+
+
+    def sample(self, rtt):
+        """
+        Folds a measured round-trip time into the estimate.
+
+        Args:
+            rtt (float): Measured round-trip time in seconds.
+        """
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = ((1 - self.BETA) * self.rttvar
+                           + self.BETA * abs(self.srtt - rtt))
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        self.samples += 1
+        rto = self.srtt + max(self.GRANULARITY, self.K * self.rttvar)
+        self.rto = min(max(rto, self._min_rto), self._max_rto)
+
+
+
+    def backoff(self):
+        """Doubles the timeout after a request to this peer timed out."""
+        self.timeouts += 1
+        self.rto = min(self.rto * 2, self._max_rto)
+
+
+
+class _RttTable:
+    """
+    Per-destination RTT estimates, shared by all threads of a `_Net`.
+
+    Args:
+        initial_rto (float): Timeout for a peer with no samples yet.
+        min_rto (float): Lower bound on any derived timeout.
+        max_rto (float): Upper bound on any derived timeout.
+    """
+
+    def __init__(self, initial_rto=1.0, min_rto=0.2, max_rto=5.0):
+        self._initial_rto = initial_rto
+        self._min_rto = min_rto
+        self._max_rto = max_rto
+        self._peers = {} # (ip, port) -> _RttEstimator
+        self._lock = threading.Lock()
+
+
+
+    def timeout(self, dest_node):
+        """Returns the current timeout for a destination, in seconds."""
+        estimator = self._peers.get((dest_node.ip, dest_node.port))
+        return estimator.rto if estimator else self._initial_rto
+
+
+
+    def srtt(self, dest_node):
+        """Returns the smoothed RTT to a destination, or None if unknown."""
+        estimator = self._peers.get((dest_node.ip, dest_node.port))
+        return estimator.srtt if estimator else None
+
+
+
+    def observe(self, dest_node, rtt):
+        """Records a round-trip time measured to a destination."""
+        with self._lock:
+            self._estimator(dest_node).sample(rtt)
+
+
+
+    def timed_out(self, dest_node):
+        """Records that a request to a destination timed out."""
+        with self._lock:
+            self._estimator(dest_node).backoff()
+
+
+
+    def stats(self):
+        """
+        Reports the estimate for every known destination.
+
+        Returns:
+            dict: "ip:port" -> dict with srtt, rttvar, rto, samples and
+                timeouts (times in seconds).
+        """
+        with self._lock:
+            return {
+                f"{ip}:{port}": {
+                    'srtt': e.srtt,
+                    'rttvar': e.rttvar,
+                    'rto': e.rto,
+                    'samples': e.samples,
+                    'timeouts': e.timeouts,
+                }
+                for (ip, port), e in self._peers.items()
+            }
+
+
+
+    def _estimator(self, dest_node):
+        peer = (dest_node.ip, dest_node.port)
+        estimator = self._peers.get(peer)
+        if estimator is None:
+            estimator = _RttEstimator(
+                self._initial_rto, self._min_rto, self._max_rto
+            )
+            self._peers[peer] = estimator
+        return estimator
@@ -0,0 +1,78 @@
+# singleflight.py
+
+import threading
+
+class _Call:
+    """An in-flight call that other callers can wait on."""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+
+class _SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one.
+
+    The first caller for a key runs the function; callers that arrive
+    while it's running wait for it and get the same result (or exception).
+    Once the call finishes, the next caller for that key starts a new one.
+
+    Attributes:
+        calls (int): Number of calls actually run.
+        shared (int): Number of callers that reused another caller's result.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+
+
+    def do(self, key, fn, *args):
+        """
+        Runs `fn(*args)`, unless a call with the same key is already running.
+
+        Args:
+            key (hashable): Identifies calls that may share a result.
+            fn (callable): The function to run.
+            *args: Arguments to call it with.
+
+        Returns:
+            The result of the (possibly shared) call.
+
+        Raises:
+            Exception: Whatever the (possibly shared) call raised.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
@@ -0,0 +1,140 @@
+# workers.py
+
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+class _WorkerPool:
+    """
+    A fixed number of worker threads fed from a bounded queue.
+
+    Work that doesn't fit in the queue is rejected instead of piling up,
+    so memory use stays predictable under bursts.
+
+    Attributes:
+        size (int): Number of worker threads.
+        queue_size (int): Maximum number of queued (not yet running) jobs.
+    """
+
+    _STOP = object()
+
+    def __init__(self, size=16, queue_size=128, name='chord-worker'):
+        self.size = size
+        self.queue_size = queue_size
+        self._name = name
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._failed = 0
+
+
+
+    def start(self):
+        """Starts the worker threads."""
+        for i in range(self.size):
+            thread = threading.Thread(
+                target=self._run,
+                name=f"{self._name}-{i}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+
+
+    def stop(self, timeout=1.0):
+        """
+        Stops the workers once they finish their current job.
+
+        Jobs still waiting in the queue are dropped.
+
+        Args:
+            timeout (float): How long to wait for each worker to exit.
+        """
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        for _ in self._threads:
+            try:
+                self._queue.put(self._STOP, timeout=timeout)
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+
+
+    def submit(self, fn, *args):
+        """
+        Queues a job for the workers.
+
+        Args:
+            fn (callable): The job to run.
+            *args: Arguments to call it with.
+
+        Returns:
+            bool: True if the job was queued, False if the queue was full.
+        """
+        try:
+            self._queue.put_nowait((fn, args))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            return False
+        with self._lock:
+            self._submitted += 1
+        return True
+
+
+
+    def stats(self):
+        """
+        Reports the pool's current load.
+
+        Returns:
+            dict: workers, active, queue_depth, queue_capacity, submitted,
+                completed, failed and rejected counts.
+        """
+        with self._lock:
+            return {
+                'workers': self.size,
+                'active': self._active,
+                'queue_depth': self._queue.qsize(),
+                'queue_capacity': self.queue_size,
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'failed': self._failed,
+                'rejected': self._rejected,
+            }
+
+
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is self._STOP:
+                return
+            fn, args = job
+            with self._lock:
+                self._active += 1
+            failed = False
+            try:
+                fn(*args)
+            except Exception as e:
+                failed = True
+                logger.error("Worker job failed: %s", e)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                    if failed:
+                        self._failed += 1
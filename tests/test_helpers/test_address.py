@@ -0,0 +1,43 @@
+# test_address.py
+import copy
+import pickle
+import pytest
+
+from chord import Address
+
+def test_address_is_slotted_and_immutable():
+    address = Address('10.0.0.1', 5000)
+
+    assert not hasattr(address, '__dict__')
+    with pytest.raises(AttributeError):
+        address.port = 5001
+    with pytest.raises(AttributeError):
+        address.extra = 1
+
+def test_address_as_dict_and_set_key():
+    a = Address('10.0.0.1', 5000, key=7)
+    b = Address('10.0.0.1', 5000, key=7)
+    c = Address('10.0.0.1', 5001, key=7)
+
+    assert a == b and hash(a) == hash(b)
+    assert len({a, b, c}) == 2
+    assert {a: 'x'}[b] == 'x'
+
+def test_packed_round_trip():
+    address = Address('192.168.1.20', 6543, 160)
+    packed = address.to_bytes()
+
+    assert len(packed) == Address.PACKED_SIZE == 4 + 2 + 20
+    assert Address.from_bytes(b'\x00' + packed, 1) == address
+
+def test_only_ipv4_addresses_pack():
+    with pytest.raises(ValueError):
+        Address('localhost', 5000).to_bytes()
+    with pytest.raises(ValueError):
+        Address('127.1', 5000).to_bytes()
+
+def test_copy_and_pickle_keep_key():
+    address = Address('10.0.0.1', 5000, key=1234)
+
+    assert copy.deepcopy(address) == address
+    assert pickle.loads(pickle.dumps(address)).key == 1234
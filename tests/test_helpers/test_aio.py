@@ -0,0 +1,156 @@
+# test_aio.py
+import asyncio
+import socket
+
+from chord import Address, AsyncNode, Node
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _owner(keys, id):
+    for key in sorted(keys):
+        if key >= id:
+            return key
+    return min(keys)
+
+def test_async_ring_lookups():
+    async def run():
+        nodes = [AsyncNode('127.0.0.1', _free_port()) for _ in range(4)]
+        await nodes[0].create()
+        for node in nodes[1:]:
+            await node.join('127.0.0.1', nodes[0].address.port)
+
+        try:
+            for _ in range(3 * len(nodes[0].finger_table)):
+                for node in nodes:
+                    await node.stabilize()
+                    await node.fix_fingers()
+
+            keys = [node.address.key for node in nodes]
+            ids = list(range(0, 2**16, 997))
+
+            # All lookups are in flight at the same time
+            results = await asyncio.gather(
+                *(nodes[i % len(nodes)].find_successor(id) for i, id in enumerate(ids))
+            )
+            for id, result in zip(ids, results):
+                assert result.key == _owner(keys, id)
+
+            for node in nodes:
+                await node.check_predecessor()
+                assert node.predecessor is not None
+        finally:
+            for node in nodes:
+                await node.stop()
+
+    asyncio.run(run())
+
+def test_async_node_serves_threaded_node():
+    async def run():
+        anchor = AsyncNode('127.0.0.1', _free_port())
+        await anchor.create()
+        joiner = Node('127.0.0.1', _free_port())
+        try:
+            # The threaded node blocks, so run it off the event loop
+            await asyncio.to_thread(joiner.join, '127.0.0.1', anchor.address.port)
+            assert joiner.successor() == anchor.address
+        finally:
+            await asyncio.to_thread(joiner.stop)
+            await anchor.stop()
+
+    asyncio.run(run())
+
+def test_async_successor_failover():
+    async def run():
+        nodes = [AsyncNode('127.0.0.1', _free_port()) for _ in range(4)]
+        await nodes[0].create()
+        for node in nodes[1:]:
+            await node.join('127.0.0.1', nodes[0].address.port)
+        alive = list(nodes)
+
+        try:
+            for _ in range(4):
+                for node in nodes:
+                    await node.stabilize()
+
+            by_key = sorted(nodes, key=lambda n: n.address.key)
+            first, dead, after = by_key[0], by_key[1], by_key[2]
+            assert first.successor() == dead.address
+            assert list(first.successor_list[:2]) == [dead.address, after.address]
+
+            await dead.stop()
+            alive.remove(dead)
+            await first.stabilize()
+
+            assert first.successor() == after.address
+            assert dead.address not in first.successor_list
+            assert dead.address not in first.finger_table
+        finally:
+            for node in alive:
+                await node.stop()
+
+    asyncio.run(run())
+
+def test_async_failed_lookup_leaves_fingers_alone():
+    async def run():
+        node = AsyncNode('127.0.0.1', _free_port())
+        await node.create()
+        try:
+            # A successor that isn't there
+            m = node._ring.m
+            gone = Address('127.0.0.1', _free_port(), key=(node.address.key + 100) % 2**m)
+            node._set_finger(0, gone)
+            node._next = m - 2
+            assert node.finger_table[node._next] is None
+
+            assert await node.find_successor(gone.key + 1) is None
+            await node.fix_fingers()
+            assert node.finger_table[m - 2] is None
+        finally:
+            await node.stop()
+
+    asyncio.run(run())
+
+def test_async_node_records_rpc_metrics():
+    async def run():
+        anchor = AsyncNode('127.0.0.1', _free_port())
+        await anchor.create()
+        joiner = AsyncNode('127.0.0.1', _free_port())
+        try:
+            await joiner.join('127.0.0.1', anchor.address.port)
+            sent = joiner.metrics_snapshot()['chord_rpc_requests_total']['values']
+            handled = anchor.metrics_snapshot()['chord_requests_handled_total']['values']
+            assert sent[('FIND_SUCCESSOR',)] >= 1
+            assert handled[('FIND_SUCCESSOR',)] >= 1
+            assert 'chord_worker_jobs_total' not in anchor.metrics_snapshot()
+        finally:
+            await joiner.stop()
+            await anchor.stop()
+
+    asyncio.run(run())
+
+def test_async_maintenance_builds_the_ring():
+    async def run():
+        nodes = [AsyncNode('127.0.0.1', _free_port()) for _ in range(4)]
+        await nodes[0].create()
+        for node in nodes[1:]:
+            await node.join('127.0.0.1', nodes[0].address.port)
+        for node in nodes:
+            node.start_maintenance(stabilize=0.01, fix_fingers=0.01,
+                                   check_predecessor=0.05)
+
+        try:
+            by_key = sorted(nodes, key=lambda n: n.address.key)
+            expected = [by_key[(i + 1) % len(by_key)].address for i in range(len(by_key))]
+            for _ in range(400):
+                if [n.successor() for n in by_key] == expected:
+                    break
+                await asyncio.sleep(0.01)
+            assert [n.successor() for n in by_key] == expected
+        finally:
+            for node in nodes:
+                await node.stop()
+
+    asyncio.run(run())
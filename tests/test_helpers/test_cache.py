@@ -0,0 +1,81 @@
+# test_cache.py
+import pytest
+from unittest.mock import patch
+
+from chord import Address
+from chord.cache import _LookupCache
+from chord.ring import get_ring
+
+def _address(key, port=5000):
+    return Address('10.0.0.1', port, key=key)
+
+@pytest.fixture
+def cache():
+    return _LookupCache(max_entries=3, ttl=30.0, ring=get_ring(16))
+
+def test_miss_then_hit(cache):
+    owner = _address(100)
+    assert cache.get(50) is None
+
+    cache.put(50, owner)
+
+    assert cache.get(50) == owner
+    assert cache.get(100) == owner
+    assert cache.get(75) == owner
+    # Only ids between the lookup and the owner are known to be covered
+    assert cache.get(49) is None
+    assert cache.get(101) is None
+    assert cache.stats()['hits'] == 3
+    assert cache.stats()['misses'] == 3
+
+def test_range_widens(cache):
+    owner = _address(100)
+    cache.put(90, owner)
+    cache.put(20, owner)
+
+    assert cache.get(21) == owner
+    assert cache.stats()['size'] == 1
+
+def test_wrap_around_range(cache):
+    owner = _address(10)
+    cache.put(65530, owner)
+
+    assert cache.get(65535) == owner
+    assert cache.get(0) == owner
+    assert cache.get(65529) is None
+
+def test_lru_eviction(cache):
+    for key in (100, 200, 300):
+        cache.put(key - 1, _address(key, key))
+    cache.get(99) # 100 is now most recently used
+
+    cache.put(399, _address(400, 400))
+
+    assert cache.get(199) is None
+    assert cache.get(99) is not None
+    assert cache.stats()['evictions'] == 1
+
+def test_ttl_expiry(cache):
+    cache.put(50, _address(100))
+
+    with patch('time.monotonic', return_value=10**9):
+        assert cache.get(50) is None
+    assert cache.stats()['size'] == 0
+
+def test_new_node_shrinks_range(cache):
+    owner = _address(100)
+    cache.put(10, owner)
+
+    cache.invalidate_key(60)
+
+    assert cache.get(60) is None
+    assert cache.get(61) == owner
+    assert cache.stats()['invalidations'] == 1
+
+def test_failed_owner_dropped(cache):
+    owner = _address(100)
+    cache.put(10, owner)
+
+    cache.invalidate_owner(owner)
+
+    assert cache.get(50) is None
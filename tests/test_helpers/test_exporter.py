@@ -0,0 +1,74 @@
+# test_exporter.py
+import asyncio
+import urllib.error
+import urllib.request
+
+import pytest
+
+from chord import Address, AsyncNode
+from chord import Node as ChordNode
+from chord.exporter import render
+from chord.metrics import _Metrics
+
+def test_render_histograms_and_escaped_labels():
+    metrics = _Metrics()
+    metrics.counter('requests_total', 'Requests.', ('peer',)).inc('a"b\\c')
+    metrics.histogram('hops', 'Hops.', bounds=(1, 2)).observe(2)
+
+    text = render(metrics.snapshot(), [('up', 'Up.', (), {(): 1})])
+    assert text.splitlines() == [
+        '# HELP requests_total Requests.',
+        '# TYPE requests_total counter',
+        'requests_total{peer="a\\"b\\\\c"} 1',
+        '# HELP hops Hops.',
+        '# TYPE hops histogram',
+        'hops_bucket{le="1"} 0',
+        'hops_bucket{le="2"} 1',
+        'hops_bucket{le="+Inf"} 1',
+        'hops_sum 2',
+        'hops_count 1',
+        '# HELP up Up.',
+        '# TYPE up gauge',
+        'up 1',
+    ]
+
+def test_metrics_server_serves_prometheus_text():
+    node = ChordNode('127.0.0.1', 0)
+    node.address = Address('127.0.0.1', 0, key=0)
+    node.finger_table = [Address('1.1.1.1', 5001, key=10)] * 8 + [None] * 8
+    node.find_successor(5)
+    port = node.start_metrics_server()
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics', timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            text = response.read().decode()
+        assert 'chord_lookups_total{mode="recursive",source="local"} 1' in text
+        assert 'chord_finger_table_entries 1' in text
+        assert 'chord_finger_table_fill_ratio 0.5' in text
+        assert 'chord_predecessor_known 0' in text
+        assert '# TYPE chord_worker_queue_depth gauge' in text
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=5)
+        assert error.value.code == 404
+    finally:
+        node.stop_metrics_server()
+
+def test_metrics_server_works_for_async_node():
+    async def run():
+        node = AsyncNode('127.0.0.1', 0)
+        await node.create()
+        port = node.start_metrics_server()
+        try:
+            url = f'http://127.0.0.1:{port}/metrics'
+            with urllib.request.urlopen(url, timeout=5) as response:
+                assert response.status == 200
+                text = response.read().decode()
+            assert 'chord_worker_queue_depth 0' in text
+            assert 'chord_connections_open 0' in text
+            assert '\nchord_successor_rtt_seconds ' not in text
+        finally:
+            await node.stop()
+        assert node._metrics_server is None
+
+    asyncio.run(run())
@@ -0,0 +1,59 @@
+# test_fingers.py
+import random
+
+from chord import Address
+from chord.fingers import _FingerTable
+from chord.ring import get_ring
+
+def _address(key):
+    return Address('10.0.0.1', 5000 + key % 1000, key=key)
+
+def _brute_force(fingers, start, id, count, exclude=()):
+    ring = get_ring(16)
+    distinct = {f for f in fingers if f and f.key not in exclude
+                and ring.between(start, id, f.key)}
+    return sorted(distinct, key=lambda f: ring.distance(f.key, id))[:count]
+
+def test_duplicates_and_none_are_indexed_once():
+    a, b = _address(100), _address(200)
+    table = _FingerTable([a, a, None, b, b, b])
+
+    assert table.preceding(0, 300, count=5) == [b, a]
+    table = table.replace(3, None).replace(4, None)
+    assert table.preceding(0, 300, count=5) == [b, a]
+    table = table.replace(5, None)
+    assert table.preceding(0, 300, count=5) == [a]
+
+def test_wrap_around_and_exclude():
+    fingers = [_address(k) for k in (65000, 65500, 10, 40)]
+    table = _FingerTable(fingers)
+
+    assert table.preceding(64000, 20) == [fingers[2]]
+    assert table.preceding(64000, 20, count=3) == [fingers[2], fingers[1], fingers[0]]
+    assert table.preceding(64000, 20, count=3, exclude={10, 65500}) == [fingers[0]]
+    assert table.preceding(65500, 5) == []
+
+def test_matches_linear_scan_under_updates():
+    rng = random.Random(3)
+    table = _FingerTable([None] * 16)
+    plain = [None] * 16
+    for _ in range(2000):
+        i = rng.randrange(16)
+        value = rng.choice([None, _address(rng.randrange(2**16))] + [f for f in plain if f])
+        table = table.replace(i, value)
+        plain[i] = value
+
+        start, id = rng.randrange(2**16), rng.randrange(2**16)
+        count = rng.randrange(1, 4)
+        assert table.preceding(start, id, count) == _brute_force(plain, start, id, count)
+
+def test_replace_leaves_the_original_untouched():
+    a, b = _address(100), _address(200)
+    table = _FingerTable([a, None])
+    updated = table.replace(1, b)
+
+    assert list(table) == [a, None]
+    assert table.preceding(0, 300, count=5) == [a]
+    assert list(updated) == [a, b]
+    assert updated.preceding(0, 300, count=5) == [b, a]
+    assert updated.replace(1, b) is updated
@@ -0,0 +1,42 @@
+# test_log.py
+import logging
+import threading
+
+from chord import start_async_logging
+
+class _Recorder(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((self.format(record), threading.current_thread()))
+
+class _Counted:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return 'counted'
+
+def test_async_logging_formats_off_the_calling_thread():
+    recorder = _Recorder()
+    arg = _Counted()
+    async_logging = start_async_logging(recorder, name='chord.test')
+    try:
+        logging.getLogger('chord.test.node').info("lookup via %s", arg)
+    finally:
+        async_logging.stop()
+
+    [(message, thread)] = recorder.records
+    assert message == 'lookup via counted'
+    assert thread is not threading.current_thread()
+    assert logging.getLogger('chord.test').propagate
+
+def test_disabled_levels_skip_formatting():
+    arg = _Counted()
+    logger = logging.getLogger('chord.test.quiet')
+    logger.setLevel(logging.WARNING)
+    logger.debug("hop %s", arg)
+    assert arg.calls == 0
@@ -0,0 +1,147 @@
+# test_maintenance.py
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+from chord import Address, AsyncNode
+from chord import Node as ChordNode
+from chord.aio import _AsyncMaintenance
+from chord.maintenance import _Maintenance
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+def test_backs_off_while_stable():
+    runs = []
+    maintenance = _Maintenance(
+        [('a', lambda: runs.append('a'), 0.01), ('b', lambda: runs.append('b'), 0.02)],
+        state=lambda: 'stable', jitter=0.0, backoff=2.0, max_slowdown=4.0
+    )
+    maintenance.start()
+    try:
+        assert _wait_for(lambda: maintenance.stats()['b']['period'] == 0.08)
+        assert maintenance.stats()['a']['period'] == 0.04
+        assert 'a' in runs and 'b' in runs
+    finally:
+        maintenance.stop()
+    assert not maintenance.is_running()
+
+def test_topology_change_restores_base_periods():
+    state = {'successor': 1}
+    maintenance = _Maintenance(
+        [('stabilize', lambda: None, 0.01), ('fix_fingers', lambda: None, 0.01)],
+        state=lambda: dict(state), jitter=0.0, backoff=2.0, max_slowdown=8.0
+    )
+    maintenance.start()
+    try:
+        assert _wait_for(lambda: all(
+            s['period'] == 0.08 for s in maintenance.stats().values()))
+        state['successor'] = 2 # e.g. a notify moved the predecessor
+        assert _wait_for(lambda: maintenance.stats()['fix_fingers']['period'] < 0.08,
+                         timeout=0.5)
+    finally:
+        maintenance.stop()
+
+def test_failing_task_keeps_scheduler_running():
+    ran = threading.Event()
+    def fail():
+        raise RuntimeError("boom")
+    maintenance = _Maintenance(
+        [('fail', fail, 0.01), ('ok', ran.set, 0.01)], state=lambda: None
+    )
+    maintenance.start()
+    try:
+        assert ran.wait(1.0)
+    finally:
+        maintenance.stop()
+
+def test_node_runs_all_maintenance_tasks():
+    with patch.object(ChordNode, 'start', return_value=None):
+        node = ChordNode('1.2.3.4', 5)
+        node.create()
+    calls = {'stabilize': 0, 'fix_fingers': 0, 'check_predecessor': 0}
+    for name in calls:
+        def count(name=name):
+            calls[name] += 1
+        setattr(node, name, count)
+
+    node.start_maintenance(stabilize=0.01, fix_fingers=0.01, check_predecessor=0.01)
+    try:
+        assert node.is_running
+        assert _wait_for(lambda: all(calls.values()))
+        assert set(node.maintenance_stats()) == set(calls)
+    finally:
+        node.stop_maintenance()
+    assert not node.is_running and node.maintenance_stats() == {}
+
+def test_notify_resets_maintenance_at_once():
+    node = ChordNode('1.2.3.4', 5)
+    node.address = Address('1.2.3.4', 5, key=1000)
+    node._maintenance = _Maintenance(
+        [('stabilize', lambda: None, 0.01)], state=node._routing_state,
+        jitter=0.0, backoff=2.0, max_slowdown=100.0
+    )
+    node._maintenance.start()
+    try:
+        assert _wait_for(lambda: node.maintenance_stats()['stabilize']['period'] >= 0.16)
+        assert node._be_notified(Address('5.6.7.8', 6, key=500))
+        assert node.maintenance_stats()['stabilize']['period'] == 0.01
+    finally:
+        node._maintenance.stop()
+
+def test_async_node_runs_maintenance_on_the_loop():
+    async def run():
+        node = AsyncNode('1.2.3.4', 5)
+        calls = {'stabilize': 0, 'fix_fingers': 0, 'check_predecessor': 0}
+        for name in calls:
+            async def count(name=name):
+                calls[name] += 1
+            setattr(node, name, count)
+
+        node.start_maintenance(stabilize=0.01, fix_fingers=0.01,
+                               check_predecessor=0.01, jitter=0.0)
+        try:
+            assert node.is_running
+            for _ in range(200):
+                if all(v >= 3 for v in calls.values()):
+                    break
+                await asyncio.sleep(0.005)
+            assert all(v >= 3 for v in calls.values())
+            # Nothing changed, so every task has backed off
+            assert all(s['period'] > 0.01 for s in node.maintenance_stats().values())
+
+            # A new predecessor wakes the scheduler at base periods
+            assert node._be_notified(Address('5.6.7.8', 6, key=node.address.key - 1))
+            assert all(s['period'] == 0.01 for s in node.maintenance_stats().values())
+        finally:
+            await node.stop()
+        assert not node.is_running and node.maintenance_stats() == {}
+
+        before = dict(calls)
+        await asyncio.sleep(0.05)
+        assert calls == before
+
+    asyncio.run(run())
+
+def test_async_maintenance_survives_failing_task():
+    async def run():
+        ran = asyncio.Event()
+        async def fail():
+            raise RuntimeError("boom")
+        async def ok():
+            ran.set()
+        maintenance = _AsyncMaintenance(
+            [('fail', fail, 0.01), ('ok', ok, 0.01)], state=lambda: None
+        )
+        maintenance.start()
+        try:
+            await asyncio.wait_for(ran.wait(), 1.0)
+        finally:
+            maintenance.stop()
+        assert not maintenance.is_running()
+
+    asyncio.run(run())
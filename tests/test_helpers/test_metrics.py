@@ -0,0 +1,34 @@
+# test_metrics.py
+import pytest
+
+from chord.metrics import _Metrics
+
+def test_counters_keep_one_series_per_label_set():
+    metrics = _Metrics()
+    requests = metrics.counter('requests_total', 'Requests.', ('method',))
+    requests.inc('PING')
+    requests.inc('PING')
+    requests.inc('NOTIFY', amount=5)
+
+    snapshot = metrics.snapshot()['requests_total']
+    assert snapshot['type'] == 'counter'
+    assert snapshot['labels'] == ('method',)
+    assert snapshot['values'] == {('PING',): 2, ('NOTIFY',): 5}
+    assert metrics.counter('requests_total', 'Requests.', ('method',)) is requests
+
+def test_histogram_buckets_are_cumulative():
+    metrics = _Metrics()
+    hops = metrics.histogram('hops', 'Hops.', bounds=(1, 2, 4))
+    for value in (0, 1, 2, 3, 9):
+        hops.observe(value)
+
+    series = metrics.snapshot()['hops']['values'][()]
+    assert series['buckets'] == [(1, 2), (2, 3), (4, 4), (float('inf'), 5)]
+    assert series['sum'] == 15
+    assert series['count'] == 5
+
+def test_names_are_bound_to_one_type():
+    metrics = _Metrics()
+    metrics.counter('x', 'X.')
+    with pytest.raises(ValueError):
+        metrics.histogram('x', 'X.')
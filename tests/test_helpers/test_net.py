@@ -1,10 +1,14 @@
 # test_net.py
 import pytest
+import selectors
 import socket
 import threading
 from unittest.mock import Mock, patch
 
 from chord import _Net
+from chord import protocol
+from chord import net as net_module
+from chord.net import _ServerConnection
 
 def test_net_initialization():
     mock_handler = Mock()
@@ -24,34 +28,88 @@ def test_net_start(mock_thread, mock_socket):
     
     # Verify socket was created and bound
     mock_socket.return_value.bind.assert_called_once_with(('localhost', 8000))
-    mock_socket.return_value.listen.assert_called_once_with(5)
+    mock_socket.return_value.listen.assert_called_once_with(128)
     
-    # Verify thread was started
-    mock_thread.assert_called_once_with(
+    # Verify listener thread was started (the rest are workers)
+    assert mock_thread.call_count == 1 + net._workers.size
+    mock_thread.assert_any_call(
         target=net._listen_for_connections,
         daemon=True
     )
 
-def test_net_handle_connection():
-    # Mock socket and request handler
-    mock_socket = Mock()
+def test_net_handle_request():
+    # Mock connection and request handler
+    mock_conn = _ServerConnection(Mock())
     mock_handler = Mock(return_value="test_response")
     
     net = _Net('localhost', 8000, mock_handler)
     
-    # Simulate receiving a request
-    mock_socket.recv.return_value = b"TEST:arg1:arg2"
-    
-    net._handle_connection(mock_socket)
+    # Simulate a request handed over by the listener
+    request = protocol.encode_request('FIND_SUCCESSOR', 7, [42, 'arg2'])
+    opcode, request_id, _ = protocol.HEADER.unpack(request[:protocol.HEADER.size])
+    net._handle_request(mock_conn, opcode, request_id,
+                        request[protocol.HEADER.size:])
     
     # Verify handler was called correctly
-    mock_handler.assert_called_once_with('TEST', ['arg1', 'arg2'])
+    mock_handler.assert_called_once_with('FIND_SUCCESSOR', [42, 'arg2'])
     
     # Verify response was sent
-    mock_socket.send.assert_called_once_with(b"test_response")
-    
-    # Verify socket was closed
-    mock_socket.close.assert_called_once()
+    mock_conn.sock.sendall.assert_called_once_with(
+        protocol.encode_response(protocol.OPCODES['FIND_SUCCESSOR'], 7, "test_response")
+    )
+
+def test_net_rejects_when_queue_full():
+    mock_conn = _ServerConnection(Mock())
+    mock_conn.buffer = bytearray(protocol.encode_request('PING', 3, []))
+    mock_conn.sock.recv.return_value = protocol.encode_request('PING', 4, [])
+    busy = protocol.encode_response(protocol.OPCODES['PING'], 4, protocol.BUSY)
+
+    net = _Net('localhost', 8000, Mock(), workers=1, queue_size=1)
+    net._selector = Mock()
+
+    # Workers aren't started, so the first request fills the queue. The
+    # BUSY reply waits for the socket to be writable.
+    net._read_connection(mock_conn)
+
+    mock_conn.sock.sendall.assert_not_called()
+    mock_conn.sock.send.assert_not_called()
+    assert mock_conn.outbox == busy
+    net._selector.modify.assert_called_with(
+        mock_conn.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, mock_conn
+    )
+    assert net.stats()['rejected'] == 1
+    assert net.stats()['queue_depth'] == 1
+
+    # A partial write keeps the rest queued
+    mock_conn.sock.send.return_value = 3
+    net._write_outbox(mock_conn)
+    assert mock_conn.outbox == busy[3:]
+
+    mock_conn.sock.send.return_value = len(busy) - 3
+    net._write_outbox(mock_conn)
+    assert mock_conn.outbox == b''
+    net._selector.modify.assert_called_with(mock_conn.sock, selectors.EVENT_READ, mock_conn)
+
+def test_busy_replies_go_out_before_the_next_response():
+    mock_conn = _ServerConnection(Mock())
+    mock_conn.outbox += b'busy'
+    net = _Net('localhost', 8000, Mock())
+
+    net._send_response(mock_conn, b'frame')
+
+    mock_conn.sock.sendall.assert_called_once_with(b'busyframe')
+    assert mock_conn.outbox == b''
+
+def test_client_that_never_reads_busy_replies_is_dropped():
+    mock_conn = _ServerConnection(Mock())
+    mock_conn.outbox += bytes(net_module.MAX_OUTBOX)
+    net = _Net('localhost', 8000, Mock())
+    net._selector = Mock()
+    net._connections[mock_conn.sock.fileno()] = mock_conn
+
+    assert not net._queue_busy(mock_conn, b'busy')
+    mock_conn.sock.close.assert_called_once()
+    assert not net._connections
 
 def test_net_stop():
     mock_handler = Mock()
@@ -60,6 +118,7 @@ def test_net_stop():
     # Mock the thread and socket
     net.network_thread = Mock()
     net.server_socket = Mock()
+    net._wakeup = (Mock(), Mock())
     
     net.stop()
     
@@ -75,29 +134,41 @@ def test_send_request_success():
     net = _Net('localhost', 8000, mock_handler)
     
     # Mock the socket to simulate a successful request
-    with patch('socket.socket') as mock_socket:
+    with patch('socket.create_connection') as mock_connect:
         # Setup mock socket behavior
         mock_socket_instance = Mock()
-        mock_socket.return_value.__enter__.return_value = mock_socket_instance
+        mock_connect.return_value = mock_socket_instance
+        sent = threading.Event()
+        mock_socket_instance.sendall.side_effect = lambda data: sent.set()
         
-        # Simulate successful connection and response
-        mock_socket_instance.recv.return_value = b"RESPONSE"
+        # Simulate the response arriving once the request was sent,
+        # then the connection closing
+        def read_frame(sock):
+            if not sent.wait(1) or mock_socket_instance.close.called:
+                return None
+            request = mock_socket_instance.sendall.call_args[0][0]
+            opcode, request_id, _ = protocol.HEADER.unpack(request[:protocol.HEADER.size])
+            sent.clear()
+            response = protocol.encode_response(opcode, request_id, "RESPONSE")
+            return opcode, request_id, response[protocol.HEADER.size:]
         
         # Call send_request
-        response = net.send_request(
-            Mock(ip='localhost', port=8001), 
-            'TEST', 
-            'arg1', 
-            'arg2'
-        )
+        with patch('chord.protocol.read_frame', side_effect=read_frame) as mock_read:
+            response = net.send_request(
+                Mock(ip='localhost', port=8001), 
+                'PING', 
+                'arg1', 
+                'arg2'
+            )
         
         # Assertions
         assert response == "RESPONSE"
         
         # Verify socket methods were called correctly
-        mock_socket_instance.connect.assert_called_once_with(('localhost', 8001))
-        mock_socket_instance.send.assert_called_once()
-        mock_socket_instance.recv.assert_called_once()
+        mock_connect.assert_called_once_with(('localhost', 8001), timeout=1.0)
+        mock_socket_instance.sendall.assert_called_once()
+        mock_read.assert_any_call(mock_socket_instance)
+    net.stop()
 
 def test_send_request_timeout():
     # Create a mock network instance
@@ -105,17 +176,14 @@ def test_send_request_timeout():
     net = _Net('localhost', 8000, mock_handler)
     
     # Mock the socket to simulate a timeout
-    with patch('socket.socket') as mock_socket:
-        mock_socket_instance = Mock()
-        mock_socket.return_value.__enter__.return_value = mock_socket_instance
-        
+    with patch('socket.create_connection') as mock_connect:
         # Simulate a timeout
-        mock_socket_instance.connect.side_effect = socket.timeout
+        mock_connect.side_effect = socket.timeout
         
         # Call send_request and check for None return
         response = net.send_request(
             Mock(ip='localhost', port=8001), 
-            'TEST', 
+            'PING', 
             'arg1', 
             'arg2'
         )
@@ -129,20 +197,276 @@ def test_send_request_connection_refused():
     net = _Net('localhost', 8000, mock_handler)
     
     # Mock the socket to simulate connection refused
-    with patch('socket.socket') as mock_socket:
-        mock_socket_instance = Mock()
-        mock_socket.return_value.__enter__.return_value = mock_socket_instance
-        
+    with patch('socket.create_connection') as mock_connect:
         # Simulate connection refused
-        mock_socket_instance.connect.side_effect = ConnectionRefusedError
+        mock_connect.side_effect = ConnectionRefusedError
         
         # Call send_request and check for None return
         response = net.send_request(
             Mock(ip='localhost', port=8001), 
-            'TEST', 
+            'PING', 
             'arg1', 
             'arg2'
         )
         
         # Assertions
         assert response is None
+
+def test_send_request_reuses_connection():
+    handler = Mock(return_value="PONG")
+    server = _Net('127.0.0.1', 0, handler)
+    server._port = _free_port()
+    server.start()
+    client = _Net('127.0.0.1', 0, Mock())
+
+    try:
+        dest = Mock(ip='127.0.0.1', port=server._port)
+        with patch('socket.create_connection',
+                   wraps=socket.create_connection) as mock_connect:
+            assert client.send_request(dest, 'PING') == "PONG"
+            assert client.send_request(dest, 'PING') == "PONG"
+
+        # Both requests went over the same connection
+        mock_connect.assert_called_once()
+        assert handler.call_count == 2
+    finally:
+        client.stop()
+        server.stop()
+
+def test_send_request_reconnects_after_peer_closes():
+    handler = Mock(return_value="PONG")
+    server = _Net('127.0.0.1', 0, handler)
+    server._port = _free_port()
+    server.start()
+    client = _Net('127.0.0.1', 0, Mock())
+
+    try:
+        dest = Mock(ip='127.0.0.1', port=server._port)
+        assert client.send_request(dest, 'PING') == "PONG"
+
+        # Break the pooled connection from underneath the client
+        for conns in client._pool._conns.values():
+            for conn in conns:
+                conn.sock.shutdown(socket.SHUT_RDWR)
+
+        assert client.send_request(dest, 'PING') == "PONG"
+    finally:
+        client.stop()
+        server.stop()
+
+def test_send_request_large_payload():
+    handler = Mock(side_effect=lambda method, args: args[0])
+    server = _Net('127.0.0.1', 0, handler)
+    server._port = _free_port()
+    server.start()
+    client = _Net('127.0.0.1', 0, Mock())
+
+    try:
+        dest = Mock(ip='127.0.0.1', port=server._port)
+        value = bytes(range(256)) * 1024
+        assert client.send_request(dest, 'PING', value) == value
+    finally:
+        client.stop()
+        server.stop()
+
+def test_unencodable_values_fail_cleanly():
+    handler = Mock(side_effect=lambda method, args: 2**200)
+    server = _Net('127.0.0.1', 0, handler)
+    server._port = _free_port()
+    server.start()
+    client = _Net('127.0.0.1', 0, Mock())
+
+    try:
+        dest = Mock(ip='127.0.0.1', port=server._port)
+        # Rejected locally, without reaching the server
+        assert client.send_request(dest, 'FIND_SUCCESSOR', -5) is None
+        assert handler.call_count == 0
+        # The server's answer can't be encoded, so it answers ERROR at once
+        assert client.send_request(dest, 'PING', timeout=2) == "ERROR"
+    finally:
+        client.stop()
+        server.stop()
+
+def test_cancelled_requests_stop_pending():
+    release = threading.Event()
+    server = _Net('127.0.0.1', 0, lambda method, args: release.wait(5) and "ALIVE")
+    server._port = _free_port()
+    server.start()
+    client = _Net('127.0.0.1', 0, Mock())
+
+    try:
+        dest = Mock(ip='127.0.0.1', port=server._port)
+        futures = [client.submit_request(dest, 'PING') for _ in range(50)]
+        for future in futures:
+            future.cancel()
+        [conn] = client._pool._conns[('127.0.0.1', server._port)]
+        assert conn.in_flight() == 0
+
+        # Late answers to cancelled requests are dropped
+        release.set()
+        assert client.send_request(dest, 'PING', timeout=5) == "ALIVE"
+    finally:
+        release.set()
+        client.stop()
+        server.stop()
+
+def test_submit_request_multiplexes_out_of_order():
+    release_slow = threading.Event()
+
+    def handler(method, args):
+        if args[0] == 'slow':
+            release_slow.wait(2)
+        return args[0]
+
+    server = _Net('127.0.0.1', 0, handler)
+    server._port = _free_port()
+    server.start()
+    client = _Net('127.0.0.1', 0, Mock())
+
+    try:
+        dest = Mock(ip='127.0.0.1', port=server._port)
+        with patch('socket.create_connection',
+                   wraps=socket.create_connection) as mock_connect:
+            slow = client.submit_request(dest, 'PING', 'slow')
+            fast = client.submit_request(dest, 'PING', 'fast')
+
+            # The second response overtakes the first on the same connection
+            assert fast.result(timeout=2) == 'fast'
+            assert not slow.done()
+            release_slow.set()
+            assert slow.result(timeout=2) == 'slow'
+
+        mock_connect.assert_called_once()
+    finally:
+        release_slow.set()
+        client.stop()
+        server.stop()
+
+def test_submit_request_connection_refused():
+    client = _Net('127.0.0.1', 0, Mock())
+
+    future = client.submit_request(Mock(ip='127.0.0.1', port=_free_port()), 'PING')
+
+    with pytest.raises(ConnectionRefusedError):
+        future.result(timeout=1)
+
+def test_ping_over_udp():
+    handler = Mock(return_value="ALIVE")
+    server = _Net('127.0.0.1', 0, handler, udp=True)
+    server._port = _free_port()
+    server.start()
+    client = _Net('127.0.0.1', 0, Mock(), udp=True)
+
+    try:
+        dest = Mock(ip='127.0.0.1', port=server._port)
+        with patch.object(client, 'send_request') as mock_tcp:
+            assert client.ping(dest)
+
+        # Answered by datagram, no TCP connection needed
+        mock_tcp.assert_not_called()
+        handler.assert_called_once_with('PING', [])
+    finally:
+        client.stop()
+        server.stop()
+
+def test_ping_falls_back_to_tcp():
+    # The peer doesn't run the UDP endpoint
+    server = _Net('127.0.0.1', 0, Mock(return_value="ALIVE"))
+    server._port = _free_port()
+    server.start()
+    client = _Net('127.0.0.1', 0, Mock(), udp=True)
+
+    try:
+        dest = Mock(ip='127.0.0.1', port=server._port)
+        assert client.ping(dest, timeout=0.05, retries=2)
+    finally:
+        client.stop()
+        server.stop()
+
+def test_ping_dead_node():
+    client = _Net('127.0.0.1', 0, Mock(), udp=True)
+
+    assert not client.ping(Mock(ip='127.0.0.1', port=_free_port()),
+                           timeout=0.05, retries=2)
+
+def test_udp_ignores_methods_that_need_the_ring():
+    handler = Mock(return_value="ALIVE")
+    server = _Net('127.0.0.1', 0, handler, udp=True)
+    server._port = _free_port()
+    server.start()
+    client = _Net('127.0.0.1', 0, Mock(), udp=True)
+
+    try:
+        dest = Mock(ip='127.0.0.1', port=server._port)
+        assert client.send_datagram(dest, 'FIND_SUCCESSOR', 1,
+                                    timeout=0.05, retries=1) is None
+        handler.assert_not_called()
+    finally:
+        client.stop()
+        server.stop()
+
+def test_timeouts_adapt_to_rtt():
+    net = _Net('localhost', 8000, Mock(), method_timeouts={'PING': 2.5})
+    dest = Mock(ip='10.0.0.2', port=5000)
+
+    # Unknown peers start from the initial timeout
+    assert net.request_timeout(dest, 'GET_PREDECESSOR') == 1.0
+
+    for _ in range(20):
+        net._rtt.observe(dest, 0.001)
+    assert net.rtt(dest) == pytest.approx(0.001)
+    assert net.request_timeout(dest, 'GET_PREDECESSOR') == 0.2 # clamped
+
+    # Per-method overrides win over the estimate
+    assert net.request_timeout(dest, 'PING') == 2.5
+    assert net.request_timeout(dest, 'FIND_SUCCESSOR') == 5.0
+
+    net._rtt.timed_out(dest)
+    assert net.request_timeout(dest, 'GET_PREDECESSOR') == 0.4
+    assert net.rtt_stats()['10.0.0.2:5000']['timeouts'] == 1
+
+def test_send_request_records_rtt():
+    server = _Net('127.0.0.1', 0, Mock(return_value="ALIVE"))
+    server._port = _free_port()
+    server.start()
+    client = _Net('127.0.0.1', 0, Mock())
+
+    try:
+        dest = Mock(ip='127.0.0.1', port=server._port)
+        for _ in range(3):
+            assert client.send_request(dest, 'PING') == "ALIVE"
+
+        stats = client.rtt_stats()[f"127.0.0.1:{server._port}"]
+        assert stats['samples'] == 3
+        assert stats['srtt'] < 1.0
+    finally:
+        client.stop()
+        server.stop()
+
+def test_requests_are_counted_and_timed():
+    server = _Net('127.0.0.1', 0, Mock(return_value="ALIVE"))
+    server._port = _free_port()
+    server.start()
+    client = _Net('127.0.0.1', 0, Mock())
+
+    try:
+        dest = Mock(ip='127.0.0.1', port=server._port)
+        assert client.send_request(dest, 'PING') == "ALIVE"
+        assert client.submit_request(dest, 'PING').result(timeout=2) == "ALIVE"
+        assert client.send_request(Mock(ip='127.0.0.1', port=_free_port()), 'PING') is None
+
+        sent = client.metrics.snapshot()
+        assert sent['chord_rpc_requests_total']['values'] == {('PING',): 3}
+        assert sent['chord_rpc_failures_total']['values'] == {('PING', 'refused'): 1}
+        latency = sent['chord_rpc_latency_seconds']['values']
+        assert latency[('PING', f"127.0.0.1:{server._port}")]['count'] == 2
+        handled = server.metrics.snapshot()['chord_requests_handled_total']
+        assert handled['values'] == {('PING',): 2}
+    finally:
+        client.stop()
+        server.stop()
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
@@ -1,10 +1,14 @@
 # test_chord.py
 import pytest
 import hashlib
+import threading
+from concurrent.futures import Future
 from unittest.mock import patch
 
 from chord import Address
 from chord import Node as ChordNode
+from chord.net import RequestTimeout
+from chord.protocol import BUSY
 
 ip = "1.2.3.4"
 port = 5
@@ -49,12 +53,12 @@ def test_is_key_in_range(node):
     
     # Test wrap-around scenario
     # Create a scenario where node's key is near the end of the hash space
-    node.address.key = 65530  # Near max of 16-bit hash space
-    node.finger_table[0] = Address(
+    node.address = Address(ip, port, key=65530)  # Near max of 16-bit hash space
+    node._set_finger(0, Address(
         ip='5.6.7.8', 
-        port=6000
-    )
-    node.successor().key = 50
+        port=6000,
+        key=50
+    ))
     
     # Test wrap-around cases
     assert node._is_key_in_range(65535) == True  # Just before wrap
@@ -68,13 +72,10 @@ def test_closest_preceding_finger_basic(node):
     """Test basic finger table routing"""
     # Create a mock finger table with some nodes
     node.finger_table = [
-        Address('1.1.1.1', 5001),
-        Address('2.2.2.2', 5002),
-        Address('3.3.3.3', 5003)
+        Address('1.1.1.1', 5001, key=10),
+        Address('2.2.2.2', 5002, key=30),
+        Address('3.3.3.3', 5003, key=50)
     ]
-    node.finger_table[0].key = 10
-    node.finger_table[1].key = 30
-    node.finger_table[2].key = 50
     
     # Test finding a node between current node and target id
     result = node.closest_preceding_finger(60)
@@ -87,15 +88,12 @@ def test_closest_preceding_finger_basic(node):
 def test_closest_preceding_finger_wrap_around(node):
     """Test closest preceding node in a wrap-around scenario"""
     # Simulate a wrap-around scenario in the hash space
-    node.address.key = 65530  # Near max of 16-bit hash space
+    node.address = Address(ip, port, key=65530)  # Near max of 16-bit hash space
     node.finger_table = [
-        Address('1.1.1.1', 5001),
-        Address('2.2.2.2', 5002),
-        Address('3.3.3.3', 5003)
+        Address('1.1.1.1', 5001, key=10),
+        Address('2.2.2.2', 5002, key=40),
+        Address('3.3.3.3', 5003, key=60)
     ]
-    node.finger_table[0].key = 10
-    node.finger_table[1].key = 40
-    node.finger_table[2].key = 60
 
     
     # Test wrap-around case
@@ -115,15 +113,13 @@ def test_closest_preceding_finger_empty_finger_table(node):
 
 def test_closest_preceding_finger_sparse_finger_table(node):
     """Test behavior with a sparse finger table"""
-    node.address.key = 0
+    node.address = Address(ip, port, key=0)
     node.finger_table = [
         None,
-        Address('1.1.1.1', 5001),
+        Address('1.1.1.1', 5001, key=30),
         None,
-        Address('2.2.2.2', 5002)
+        Address('2.2.2.2', 5002, key=50)
     ]
-    node.finger_table[1].key = 30
-    node.finger_table[3].key = 50
     
     # Should return the first valid finger
     result = node.closest_preceding_finger(40)
@@ -133,3 +129,466 @@ def test_closest_preceding_finger_sparse_finger_table(node):
     result = node.closest_preceding_finger(10)
     assert result == node.address
 
+
+def test_find_successor_coalesces_concurrent_lookups(node):
+    import threading
+
+    node.address = Address(ip, port, key=0)
+    node.finger_table = [Address('1.1.1.1', 5001, key=10),
+                         Address('2.2.2.2', 5002, key=100)]
+    owner = Address('3.3.3.3', 5003, key=600)
+
+    release = threading.Event()
+    def request(dest, method, id):
+        release.wait(2)
+        return owner
+
+    with patch.object(node._net, 'request', side_effect=request) as mock_send:
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(node.find_successor(500)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        # Let every lookup reach the in-flight request before it completes
+        for _ in range(100):
+            if node._lookups.shared == len(threads) - 1:
+                break
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+    mock_send.assert_called_once_with(node.finger_table[1], 'FIND_SUCCESSOR', 500)
+    assert results == [owner] * len(threads)
+
+def test_find_successor_uses_cache():
+    node = ChordNode(ip, port, cache_size=16)
+    node.address = Address(ip, port, key=0)
+    node._set_finger(0, Address('1.1.1.1', 5001, key=10))
+    node._set_finger(1, Address('2.2.2.2', 5002, key=100))
+    owner = Address('3.3.3.3', 5003, key=600)
+
+    with patch.object(node._net, 'request', return_value=owner) as mock_send:
+        assert node.find_successor(500) == owner
+        assert node.find_successor(550) == owner
+        # 450 is behind the id looked up, so it isn't known to be covered
+        assert node.find_successor(450) == owner
+        assert node.find_successor(520) == owner
+
+    assert mock_send.call_count == 2
+    assert node.cache_stats()['hits'] == 2
+
+    # A node that joins inside the cached range takes part of it over
+    joiner = Address('4.4.4.4', 5004, key=480)
+    node._be_notified(joiner)
+    with patch.object(node._net, 'request', return_value=joiner) as mock_send:
+        assert node.find_successor(470) == joiner
+    mock_send.assert_called_once()
+
+def _ring(keys, dead=(), slow=(), busy=(), **kwargs):
+    """
+    Builds nodes with correct fingers whose RPCs are delivered in-process.
+    Nodes with keys in `dead` don't answer; nodes in `slow` never answer
+    requests made with submit_request; nodes in `busy` answer BUSY.
+    """
+    keys = sorted(keys)
+    nodes = {}
+    for i, k in enumerate(keys):
+        n = ChordNode('10.0.0.1', 6000 + i, **kwargs)
+        n.address = Address(n.address.ip, n.address.port, key=k)
+        nodes[(n.address.ip, n.address.port)] = n
+
+    by_key = {n.address.key: n for n in nodes.values()}
+    def owner(id):
+        id %= 2 ** kwargs.get('m', 16)
+        for k in keys:
+            if k >= id:
+                return by_key[k].address
+        return by_key[keys[0]].address
+
+    def deliver(dest, method, *args, timeout=None):
+        target = nodes[(dest.ip, dest.port)]
+        if target.address.key in dead:
+            return None
+        if target.address.key in busy:
+            return BUSY
+        return target._process_request(method, list(args))
+
+    def request(dest, method, *args, timeout=None):
+        response = deliver(dest, method, *args)
+        if response is None:
+            raise ConnectionRefusedError()
+        return response
+
+    def submit(dest, method, *args):
+        future = Future()
+        if nodes[(dest.ip, dest.port)].address.key in slow:
+            return future
+        response = deliver(dest, method, *args)
+        if response is None:
+            future.set_exception(ConnectionRefusedError())
+        else:
+            future.set_result(response)
+        return future
+
+    for n in nodes.values():
+        n.finger_table = [owner(n.address.key + 2**i)
+                          for i in range(len(n.finger_table))]
+        i = keys.index(n.address.key)
+        n.successor_list = [by_key[keys[(i + j) % len(keys)]].address
+                            for j in range(1, 5)]
+        n.predecessor = by_key[keys[i - 1]].address
+        n._net.send_request = deliver
+        n._net.request = request
+        n._net.submit_request = submit
+    return by_key, owner
+
+def test_iterative_lookup():
+    nodes, owner = _ring(range(0, 2**16, 2**16 // 32), lookup_mode='iterative')
+    origin = nodes[0]
+
+    for id in range(1, 2**16, 1237):
+        assert origin.find_successor(id) == owner(id)
+
+    _, latencies = origin._iterative_lookup(2**15 + 5)
+    assert 1 <= len(latencies) <= 16
+
+    metrics = origin.metrics_snapshot()
+    hops = metrics['chord_lookup_hops']['values'][('iterative',)]
+    lookups = metrics['chord_lookups_total']['values']
+    assert hops['count'] == lookups[('iterative', 'remote')] + 1
+    assert 1 <= hops['sum'] / hops['count'] <= 16
+
+def test_iterative_lookup_routes_around_failed_hop():
+    keys = list(range(0, 2**16, 2**16 // 32))
+    # 32768 is the finger the origin would use for ids in the second half
+    nodes, owner = _ring(keys, dead={32768}, lookup_mode='iterative')
+
+    assert nodes[0].find_successor(40000) == owner(40000)
+
+def test_parallel_lookup():
+    nodes, owner = _ring(range(0, 2**16, 2**16 // 32), lookup_mode='parallel')
+
+    for id in range(1, 2**16, 1237):
+        assert nodes[0].find_successor(id) == owner(id)
+
+    result, hops, latencies = nodes[0].lookup(2**15 + 5, alpha=2)
+    assert result == owner(2**15 + 5)
+    assert hops == len(latencies) >= 1
+
+def test_parallel_lookup_skips_slow_and_dead_nodes():
+    keys = list(range(0, 2**16, 2**16 // 32))
+    nodes, owner = _ring(keys, dead={32768}, slow={30720})
+    submit = nodes[0]._net.submit_request
+    futures = []
+    def record(dest, method, *args):
+        futures.append(submit(dest, method, *args))
+        return futures[-1]
+    nodes[0]._net.submit_request = record
+
+    # Neither of the two best candidates answers, the third does
+    result, hops, _ = nodes[0].lookup(40000, alpha=3)
+    assert result == owner(40000)
+    # The slow node's request isn't left pending
+    assert all(f.done() for f in futures)
+
+def test_stabilize_fails_over_to_next_successor():
+    keys = list(range(0, 2**16, 2**16 // 32))
+    nodes, owner = _ring(keys, dead={2048})
+    node = nodes[0]
+
+    node.stabilize()
+
+    # The dead successor is skipped and its own successor takes over
+    assert node.successor() == nodes[4096].address
+    assert node.successor_list[:3] == tuple(nodes[k].address for k in (4096, 6144, 8192))
+    assert nodes[2048].address not in node.finger_table
+
+def test_find_successor_skips_dead_finger():
+    keys = list(range(0, 2**16, 2**16 // 32))
+    nodes, owner = _ring(keys, dead={32768})
+
+    assert nodes[0].find_successor(40000) == owner(40000)
+    assert nodes[32768].address not in nodes[0].finger_table
+
+def test_recursive_lookup_keeps_hops_that_time_out():
+    keys = list(range(0, 2**16, 2**16 // 32))
+    nodes, owner = _ring(keys)
+    origin = nodes[0]
+    request = origin._net.request
+    def slow_chain(dest, method, *args, timeout=None):
+        # The hop is up, but the lookup stalls somewhere behind it
+        if dest.key == 32768:
+            raise RequestTimeout("no answer")
+        return request(dest, method, *args)
+    origin._net.request = slow_chain
+    before = origin._routing_state()
+
+    assert origin.find_successor(40000) == owner(40000)
+    assert origin._routing_state() == before
+
+def test_stabilize_gives_up_when_it_cannot_reach_itself():
+    node = ChordNode('127.0.0.1', 1)
+    node._set_finger(0, node.address)
+    node._net.send_request = lambda dest, method, *args, timeout=None: None
+
+    node.stabilize()
+
+    assert node.successor() == node.address
+
+def test_find_successors_batches_by_next_hop():
+    keys = list(range(0, 2**16, 2**16 // 32))
+    nodes, owner = _ring(keys)
+    origin = nodes[0]
+    sent = []
+    submit = origin._net.submit_request
+    def counting_submit(dest, method, *args):
+        sent.append((dest.key, method, list(args[0])))
+        return submit(dest, method, *args)
+    origin._net.submit_request = counting_submit
+
+    ids = [1, 500, 3000, 40000, 40001, 65000, 500]
+    results = origin.find_successors(ids)
+
+    assert results == {id: owner(id) for id in ids}
+    # One request per distinct next hop, none for ids the origin owns
+    assert len(sent) == len({hop for hop, _, _ in sent}) < len(set(ids))
+    assert all(method == 'FIND_SUCCESSORS' for _, method, _ in sent)
+    assert 1 not in [id for _, _, group in sent for id in group]
+
+def test_find_successors_routes_around_dead_hop():
+    keys = list(range(0, 2**16, 2**16 // 32))
+    nodes, owner = _ring(keys, dead={32768})
+
+    ids = [40000, 50000, 100]
+    assert nodes[0].find_successors(ids) == {id: owner(id) for id in ids}
+
+def test_find_successors_keeps_hop_that_times_out():
+    keys = list(range(0, 2**16, 2**16 // 32))
+    nodes, owner = _ring(keys, slow={32768})
+    origin = nodes[0]
+    origin._net.request_timeout = lambda dest, method: 0.05
+    before = origin._routing_state()
+
+    # The batch via 32768 gets no answer; each id is looked up on its own
+    ids = [40000, 50000, 100]
+    assert origin.find_successors(ids) == {id: owner(id) for id in ids}
+    assert origin._routing_state() == before
+
+def test_proximity_fingers_pick_nearest_valid_node():
+    keys = list(range(0, 2**16, 2**16 // 32))
+    nodes, owner = _ring(keys, proximity_fingers=True)
+    origin = nodes[0]
+    rtts = {k: 0.010 for k in keys}
+    rtts[6144] = 0.001
+    rtts[8192] = 0.0001 # fastest, but past finger 12's interval
+    origin._net.rtt = lambda dest: rtts[dest.key]
+
+    # Finger 12 covers [4096, 8192)
+    origin._next = 12
+    origin.fix_fingers()
+    assert origin.finger_table[12].key == 6144
+
+    # The successor is never replaced by a nearer node
+    origin._next = 0
+    origin.fix_fingers()
+    assert origin.finger_table[0].key == 2048
+
+    for id in range(1, 2**16, 1237):
+        assert origin.find_successor(id) == owner(id)
+
+def test_lookups_on_160_bit_ring():
+    space = 2**160
+    keys = [space // 32 * i + 12345 for i in range(32)]
+    nodes, owner = _ring(keys, m=160)
+    origin = nodes[keys[0]]
+    assert len(origin.finger_table) == 160
+
+    for id in range(1, space, space // 97):
+        assert origin.find_successor(id) == owner(id)
+
+    origin._next = 159
+    origin.fix_fingers()
+    assert origin.finger_table[159] == owner(keys[0] + 2**159)
+
+def test_join_warm_starts_finger_table():
+    keys = list(range(0, 2**16, 2**16 // 32))
+    nodes, owner = _ring(keys)
+    by_peer = {(n.address.ip, n.address.port): n for n in nodes.values()}
+    sent = []
+    def deliver(dest, method, *args, timeout=None):
+        sent.append(method)
+        return by_peer[(dest.ip, dest.port)]._process_request(method, list(args))
+    def submit(dest, method, *args):
+        future = Future()
+        future.set_result(deliver(dest, method, *args))
+        return future
+
+    joiner = ChordNode('10.0.0.2', 7000)
+    joiner.address = Address('10.0.0.2', 7000, key=1000)
+    joiner._net.send_request = deliver
+    joiner._net.submit_request = submit
+    joiner.fix_fingers = lambda: None
+    joiner.join('10.0.0.1', 6000, use_predecessor=True)
+
+    for i, finger in enumerate(joiner.finger_table):
+        assert finger == owner(1000 + 2**i)
+    assert sent[:4] == ['FIND_SUCCESSOR', 'GET_PREDECESSOR', 'GET_FINGERS', 'GET_FINGERS']
+    assert len(sent) < 16
+
+def test_fix_fingers_skips_lookups_for_known_owners():
+    keys = [0, 1000, 20000, 40000]
+    nodes, owner = _ring(keys)
+    origin = nodes[0]
+    origin.finger_table = [origin.finger_table[0]] + [None] * 15
+    origin._next = 0
+    with patch.object(origin, 'find_successor', wraps=origin.find_successor) as lookups:
+        calls = 0
+        while any(f is None for f in origin.finger_table):
+            origin.fix_fingers()
+            calls += 1
+
+    for i, finger in enumerate(origin.finger_table):
+        assert finger == owner(2**i)
+    # Fingers 0-9 belong to the successor; 10-14 to node 20000, found once;
+    # 15 needs the only other lookup
+    assert lookups.call_count == 2
+    assert calls == 2
+
+def test_fix_fingers_finds_node_that_never_notified_us():
+    keys = [0, 1000, 20000, 40000]
+    nodes, owner = _ring(keys)
+    origin, before_join = nodes[0], nodes[1000]
+    joined = nodes[20000].address
+
+    # Before 20000 joins, node 1000's successor is 40000
+    fingers = list(before_join.finger_table)
+    before_join.finger_table = [nodes[40000].address if f == joined else f
+                                for f in fingers]
+    for _ in range(16):
+        origin.fix_fingers()
+    assert origin.finger_table[10] == nodes[40000].address
+
+    # 20000 joins between 1000 and 40000; the origin's successor and
+    # predecessor don't change, so nothing tells it
+    before_join.finger_table = fingers
+    with patch.object(origin, 'find_successor', wraps=origin.find_successor) as lookups:
+        for _ in range(32):
+            origin.fix_fingers()
+
+    assert lookups.call_count > 0
+    for i, finger in enumerate(origin.finger_table):
+        assert finger == owner(2**i)
+
+def test_routing_snapshots_are_never_torn():
+    node = ChordNode(ip, port)
+    node.address = Address(ip, port, key=0)
+    a, b = Address('1.1.1.1', 5001, key=100), Address('2.2.2.2', 5002, key=200)
+    node.finger_table = [a] * 16
+    node.successor_list = [a]
+    stop = threading.Event()
+
+    def churn():
+        while not stop.is_set():
+            for dead, alive in ((a, b), (b, a)):
+                for i in range(16):
+                    node._set_finger(i, alive)
+                node.successor_list = [alive]
+                node._forget_node(dead)
+
+    writers = [threading.Thread(target=churn) for _ in range(2)]
+    for t in writers:
+        t.start()
+    try:
+        for _ in range(20000):
+            predecessor, successors, fingers = node._routing_state()
+            # Every index entry is a finger in the same snapshot
+            for finger in fingers.preceding(0, 300, count=5):
+                assert finger in fingers
+    finally:
+        stop.set()
+        for t in writers:
+            t.join()
+
+def test_successor_changes_are_never_torn():
+    node = ChordNode(ip, port)
+    node.address = Address(ip, port, key=0)
+    a, b = Address('1.1.1.1', 5001, key=100), Address('2.2.2.2', 5002, key=200)
+    node._set_successors([a, b])
+    stop = threading.Event()
+
+    def churn():
+        while not stop.is_set():
+            node._adopt_successors(a, [b], None, set(), node._forgets)
+            node._adopt_successors(a, [b], b, set(), node._forgets)
+            node._set_successors([a])
+
+    writer = threading.Thread(target=churn)
+    writer.start()
+    try:
+        for _ in range(20000):
+            routing = node._routing
+            assert routing.finger_table[0] == routing.successor_list[0]
+    finally:
+        stop.set()
+        writer.join()
+
+def test_stabilize_keeps_nodes_forgotten_meanwhile_out():
+    keys = [0, 1000, 20000, 40000]
+    nodes, owner = _ring(keys)
+    origin = nodes[0]
+    dead = nodes[20000].address
+    request = origin._net.send_request
+    def send_request(dest, method, *args, timeout=None):
+        response = request(dest, method, *args)
+        if method == 'GET_SUCCESSOR_LIST':
+            # A request handler finds 20000 dead while stabilize waits
+            origin._forget_node(dead)
+        return response
+    origin._net.send_request = send_request
+
+    origin.stabilize()
+
+    assert origin.successor() == nodes[1000].address
+    assert dead not in origin.successor_list
+    assert dead not in origin.finger_table
+    assert origin.successor_list[0] == origin.finger_table[0]
+
+@pytest.mark.parametrize('mode', ['recursive', 'iterative', 'parallel'])
+def test_busy_nodes_are_routed_around_not_forgotten(mode):
+    keys = list(range(0, 2**16, 2**16 // 32))
+    nodes, owner = _ring(keys, busy={32768}, lookup_mode=mode)
+    origin = nodes[0]
+    before = origin._routing_state()
+
+    # Only the busy node knows the owner of ids just past it
+    ids = [id for id in range(1, 2**16, 1237) if not 32768 < id <= 34816]
+    for id in ids:
+        assert origin.find_successor(id) == owner(id)
+    assert origin.find_successors(ids) == {id: owner(id) for id in ids}
+
+    assert origin._routing_state() == before
+    assert origin._net.ping(nodes[32768].address)
+
+@pytest.mark.parametrize('reply', [BUSY, 'ERROR'])
+def test_failed_lookup_leaves_fingers_alone(reply):
+    keys = [0, 1000, 20000, 40000]
+    nodes, owner = _ring(keys)
+    origin = nodes[0]
+    before = list(origin.finger_table)
+    request = origin._net.request
+    def failing(dest, method, *args, timeout=None):
+        if method == 'FIND_SUCCESSOR':
+            return reply
+        return request(dest, method, *args)
+    origin._net.request = failing
+
+    origin._next = 10
+    origin.fix_fingers()
+
+    # The failed lookup isn't mistaken for an owner of the whole ring
+    assert origin.find_successor(1024) is None
+    assert origin._last_lookup is None
+    assert list(origin.finger_table) == before
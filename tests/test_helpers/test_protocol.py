@@ -0,0 +1,85 @@
+# test_protocol.py
+import pytest
+
+from chord import Address
+from chord import protocol
+
+def _split(frame):
+    opcode, request_id, length = protocol.HEADER.unpack(frame[:protocol.HEADER.size])
+    payload = frame[protocol.HEADER.size:]
+    assert len(payload) == length
+    return opcode, request_id, payload
+
+def test_request_round_trip():
+    address = Address('10.0.0.1', 5000)
+    frame = protocol.encode_request(
+        'NOTIFY', 12, [address, 2**159 + 3, "ALIVE", None, [1, [address]], b"\x00\x01"]
+    )
+    opcode, request_id, payload = _split(frame)
+
+    assert protocol.METHODS[opcode] == 'NOTIFY'
+    assert request_id == 12
+    decoded = protocol.decode_values(payload)
+    assert decoded == [address, 2**159 + 3, "ALIVE", None, [1, [address]], b"\x00\x01"]
+    assert decoded[0].key == address.key
+
+def test_address_with_hostname_round_trip():
+    address = Address('localhost', 5000, key=1234)
+    opcode, _, payload = _split(protocol.encode_response(2, 1, address))
+
+    assert opcode == 2 | protocol.RESPONSE
+    decoded = protocol.decode_value(payload)
+    assert decoded == address
+    assert decoded.ip == 'localhost'
+
+def test_ipv4_address_is_packed():
+    frame = protocol.encode_response(2, 1, Address('10.0.0.1', 5000))
+
+    # tag + packed ip + port + key
+    assert len(frame) == protocol.HEADER.size + 1 + 4 + 2 + protocol.ID_BYTES
+
+def test_unknown_method_rejected():
+    with pytest.raises(ValueError):
+        protocol.encode_request('NOT_A_METHOD', 1, [])
+
+def test_busy_round_trip():
+    _, _, payload = _split(protocol.encode_response(1, 1, protocol.BUSY))
+
+    assert protocol.decode_value(payload) is protocol.BUSY
+
+def test_out_of_range_ints_rejected():
+    for value in (-5, protocol.MAX_INT + 1):
+        with pytest.raises(ValueError):
+            protocol.encode_request('FIND_SUCCESSOR', 1, [value])
+        with pytest.raises(ValueError):
+            protocol.encode_response(2, 1, [value])
+
+def test_oversized_strings_and_host_names_rejected():
+    for value in ('x' * 0x10000, Address('h' * 256, 5000, key=1)):
+        with pytest.raises(ValueError):
+            protocol.encode_request('NOTIFY', 1, [value])
+        with pytest.raises(ValueError):
+            protocol.encode_response(2, 1, value)
+
+def test_deeply_nested_lists_rejected():
+    payload = bytes([protocol._LIST, 0, 0, 0, 1]) * 25000 + bytes([protocol._NIL])
+
+    with pytest.raises(ValueError):
+        protocol.decode_values(payload)
+
+def test_truncated_payload_rejected():
+    _, _, payload = _split(protocol.encode_response(1, 1, [1, 2, 3]))
+
+    with pytest.raises(ValueError):
+        protocol.decode_values(payload[:-1])
+
+def test_decoded_addresses_are_interned():
+    address = Address('10.0.0.1', 5000, key=77)
+    frame = protocol.encode_request('NOTIFY', 1, [address, [address]])
+    first, [second] = protocol.decode_values(_split(frame)[2])
+
+    assert first is second
+    assert first is Address.intern('10.0.0.1', 5000, 77)
+    assert first == address and hash(first) == hash(address)
+    with pytest.raises(AttributeError):
+        first.key = 78
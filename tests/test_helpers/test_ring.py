@@ -0,0 +1,41 @@
+# test_ring.py
+import hashlib
+import pytest
+
+from chord import Address
+from chord import protocol
+from chord.ring import get_ring
+
+def test_hash_matches_sha1_low_bits():
+    for m in (16, 64, 160):
+        expected = int(hashlib.sha1(b"10.0.0.1:5000").hexdigest(), 16) % (2**m)
+        assert get_ring(m).hash("10.0.0.1:5000") == expected
+        assert Address('10.0.0.1', 5000, m).key == expected
+
+def test_between_wraps_around():
+    ring = get_ring(16)
+    assert ring.between(10, 20, 15)
+    assert not ring.between(10, 20, 20)
+    assert ring.between(65530, 5, 0)
+    assert ring.between(65530, 5, 65535)
+    assert not ring.between(65530, 5, 100)
+    # start == end covers everything but start
+    assert ring.between(7, 7, 8) and not ring.between(7, 7, 7)
+
+def test_finger_start_reduced_onto_ring():
+    ring = get_ring(160)
+    assert ring.finger_start(2**160 - 1, 0) == 0
+    assert ring.finger_start(5, 159) == 2**159 + 5
+    assert ring.distance(2**160 - 1, 3) == 4
+
+def test_rejects_bad_width():
+    with pytest.raises(ValueError):
+        get_ring(0)
+    with pytest.raises(ValueError):
+        get_ring(161)
+
+def test_160_bit_address_round_trip():
+    address = Address('10.0.0.1', 5000, 160)
+    frame = protocol.encode_response(2, 1, address)
+    decoded = protocol.decode_value(frame[protocol.HEADER.size:])
+    assert decoded == address and decoded.key >= 2**16